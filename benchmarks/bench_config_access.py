@@ -0,0 +1,42 @@
+""" Read access to config values of a System 
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_config_access.py [n_reads] 
+
+Compares the time per read of: 
+    - a plain instance attribute (reference)
+    - the value on the config model: system.__config__.gain 
+    - a plain config value: system.gain (ConfigValueAttribute)
+    - a config value which may hold a factory: system.anything (ConfigAttribute)
+"""
+import sys
+import timeit
+from typing import Any
+
+from systemy import BaseSystem 
+
+class Controller(BaseSystem):
+    class Config:
+        gain: float = 1.0 
+        anything: Any = 0.0 
+
+class Plain:
+    def __init__(self):
+        self.gain = 1.0 
+
+def main(n: int = 1_000_000):
+    ctrl = Controller()
+    plain = Plain()
+    cases = [
+        ("plain attribute", "plain.gain"), 
+        ("system.__config__.gain", "ctrl.__config__.gain"), 
+        ("system.gain", "ctrl.gain"), 
+        ("system.anything", "ctrl.anything"), 
+    ]
+    print(f"{n} reads")
+    for title, stmt in cases:
+        t = min(timeit.repeat(stmt, number=n, repeat=5, globals={'plain':plain, 'ctrl':ctrl}))
+        print(f"    {title:25s} {t/n*1e9:8.1f} ns/read")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,62 @@
+""" Diff of two large factory trees differing by a few fields
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_diff.py [n_groups]
+
+Two trees of n_groups groups of 100 motors are created (n_groups=1000 is
+about 100k factories), the second one has 3 modified speeds. Times are given for:
+    - pydantic ==             : old == new
+    - diff                    : diff_factories(old, new), values are compared
+    - diff, trust_cache       : diff_factories(old, new, trust_cache=True), fresh trees
+    - diff, trust_cache again : the same after 3 more changes, fingerprints are cached
+"""
+import sys
+import time
+from typing import Dict
+
+from systemy import BaseSystem
+from systemy.compare import diff_factories
+
+class Motor(BaseSystem):
+    class Config:
+        speed: float = 1.0
+        position: float = 0.0
+        name: str = ""
+
+class Group(BaseSystem):
+    class Config:
+        motors: Dict[str, Motor.Config] = {}
+
+class Root(BaseSystem):
+    class Config:
+        groups: Dict[str, Group.Config] = {}
+
+
+def make_tree(n: int) -> Root.Config:
+    return Root.Config(groups={str(i):{'motors':{str(j):{'name':str(j)} for j in range(100)}} for i in range(n)})
+
+def modify(config: Root.Config, value: float) -> None:
+    for i in (1, 7, 42):
+        config.groups[str(i%len(config.groups))].motors[str(i)].speed = value
+
+def timed(func):
+    t0 = time.perf_counter()
+    result = func()
+    return time.perf_counter()-t0, result
+
+def main(n: int = 1000):
+    print(f"{n*101+1} factories per tree")
+    old, new = make_tree(n), make_tree(n)
+    modify(new, 2.0)
+    t, _ = timed(lambda: old == new)
+    print(f"    {'pydantic ==':25s} {t*1e3:8.1f} ms")
+    t, changes = timed(lambda: diff_factories(old, new))
+    print(f"    {'diff':25s} {t*1e3:8.1f} ms   {len(changes)} changes")
+    t, changes = timed(lambda: diff_factories(old, new, trust_cache=True))
+    print(f"    {'diff, trust_cache':25s} {t*1e3:8.1f} ms   {len(changes)} changes")
+    modify(new, 3.0)
+    t, changes = timed(lambda: diff_factories(old, new, trust_cache=True))
+    print(f"    {'diff, trust_cache again':25s} {t*1e3:8.1f} ms   {len(changes)} changes")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,33 @@
+""" Import time of systemy measured with python -X importtime 
+
+Usage:
+    python benchmarks/bench_import.py [n_runs] 
+
+The best cumulative time over n_runs fresh interpreters is given for:
+    - import systemy 
+    - import systemy + loaders (first access to systemy.SystemLoader)
+and the slowest modules imported by systemy are listed.
+"""
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_root, "tests"))
+from test_import import import_times
+
+def main(n_runs: int = 10):
+    for title, statement, modules in [
+            ("import systemy", "import systemy", ["systemy"]), 
+            ("import systemy + loaders", "import systemy.loaders", ["systemy", "systemy.loaders"]), 
+        ]:
+        # the first imported module includes the time of the others
+        best = min( max(import_times(statement)[m] for m in modules) for _ in range(n_runs) )
+        print(f"{title:30s} {best/1000:8.2f} ms")
+    
+    print("\nslowest modules of 'import systemy'")
+    times = min((import_times("import systemy") for _ in range(n_runs)), key=lambda times: times["systemy"])
+    for name, t in sorted(times.items(), key=lambda item: -item[1])[:10]:
+        print(f"    {name:40s} {t/1000:8.2f} ms")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,60 @@
+""" Compare the compiled and the interpreted backend of !math expressions 
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_math.py [n_expressions] 
+
+Times are given for a corpus of random expressions: 
+    - parse: parse (and compile) + first evaluation of every expression 
+    - evaluate: evaluation only of already parsed expressions 
+"""
+import random
+import sys
+import timeit
+
+from systemy import loaders 
+
+_templates = [
+    "{a}+{b}*{c}", 
+    "sin(pi/{a})*{b}", 
+    "sqrt({a}^2+{b}^2)", 
+    "max({a},{b},{c})-min({a},{b})", 
+    "if({a}>{b}, {c}, -{c})", 
+    "({a}+{b})*({c}-{a})/({b}+1)", 
+    "cos({a}*pi/180)*{b} + sin({c}*pi/180)*{a}", 
+    "log({a}+1)*exp({b}/100)", 
+]
+
+def make_corpus(n: int, seed: int = 0):
+    rnd = random.Random(seed)
+    return [
+        rnd.choice(_templates).format(a=rnd.randint(1,99), b=rnd.randint(1,99), c=rnd.randint(1,99)) 
+        for i in range(n)
+    ]
+
+def bench(corpus, backend, repeat: int = 5):
+    loaders.set_math_backend(backend)
+    
+    def parse():
+        loaders.clear_math_cache() 
+        for expression in corpus:
+            evaluate, _ = loaders._parse_math(expression)
+            evaluate()
+    parse_time = min(timeit.repeat(parse, number=1, repeat=repeat))
+    
+    evaluators = [loaders._parse_math(expression)[0] for expression in corpus]
+    def evaluate():
+        for evaluate in evaluators:
+            evaluate()
+    evaluate_time = min(timeit.repeat(evaluate, number=1, repeat=repeat))
+    return parse_time, evaluate_time
+
+def main(n: int = 1000):
+    corpus = make_corpus(n)
+    print(f"{n} expressions")
+    for backend in loaders.MathBackend:
+        parse_time, evaluate_time = bench(corpus, backend)
+        print(f"{backend.value:>12}: parse {parse_time*1e3:8.2f} ms   evaluate {evaluate_time*1e3:8.2f} ms")
+    loaders.set_math_backend(loaders.MathBackend.INTERPRETED)
+
+if __name__ == "__main__":
+    main( *(int(a) for a in sys.argv[1:]) )
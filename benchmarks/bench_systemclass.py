@@ -0,0 +1,56 @@
+""" Time spent in the creation of System classes 
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_systemclass.py [n_classes] 
+
+A family of n_classes is defined, a quarter of them with their own Config 
+(a few values and one subsystem) and the others as plain subclasses which do 
+not modify the Config. Times are given for: 
+    - define: class statements only 
+    - define + instantiate: each class is also instantiated once 
+"""
+import sys
+import time
+
+from systemy import BaseSystem 
+
+class Motor(BaseSystem):
+    class Config:
+        speed: float = 1.0 
+        position: float = 0.0 
+
+
+def define_classes(n: int):
+    classes = []
+    for i in range(n):
+        if i%4 == 0:
+            class Device(BaseSystem):
+                class Config:
+                    address: str = "localhost"
+                    port: int = 4840 
+                    timeout: float = 1.0 
+                    motor: Motor.Config = Motor.Config()
+            Base = Device 
+        else:
+            class Device(Base):
+                def run(self):
+                    return self.port 
+            Base = Device 
+        classes.append(Device)
+    return classes 
+
+def main(n: int = 2000):
+    tic = time.perf_counter()
+    define_classes(n)
+    define_time = time.perf_counter()-tic 
+    
+    tic = time.perf_counter()
+    for cls in define_classes(n):
+        cls()
+    total_time = time.perf_counter()-tic 
+    print(f"{n} classes")
+    print(f"    define               {define_time*1000:8.2f} ms  {define_time/n*1e6:8.2f} us/class")
+    print(f"    define + instantiate {total_time*1000:8.2f} ms  {total_time/n*1e6:8.2f} us/class")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -5,17 +5,44 @@ from .system import (
         systemclass, 
         SystemList, 
         SystemDict, 
+        LazySystemList, 
+        LazySystemDict, 
         FactoryDict, 
         FactoryList, 
-        find_factories
+        find_factories, 
+        clear_find_factories_cache, 
+        build_contention_count, 
+        parse_system_path,
+        ConfigChange,
+        notification_batch
     )
-from .loaders import (
-        SystemLoader,
-        SystemIo, 
+from .registry import (
         register_factory,
+        register_lazy_factory, 
         get_system_class,
         get_factory_class, 
         iter_factory,
         iter_system_class
     )
 
+# The yaml loader machinery (yaml, attrs, math parser) and the comparison of 
+# factory trees are imported on first access
+_loaders_attributes = {"SystemLoader", "SystemIo"}
+_compare_attributes = {"fingerprint", "same_tree", "diff_factories", "FactoryChange"}
+_submodules = {"loaders", "compare", "snapshot"}
+
+def __getattr__(name):
+    if name in _loaders_attributes:
+        from . import loaders
+        return getattr(loaders, name)
+    if name in _compare_attributes:
+        from . import compare
+        return getattr(compare, name)
+    if name in _submodules:
+        # __import__ rather than importlib.import_module, which -X importtime does not trace 
+        __import__(f"{__name__}.{name}")
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()).union(_loaders_attributes, _compare_attributes, _submodules))
@@ -0,0 +1,267 @@
+""" Comparison of factory trees
+
+fingerprint(factory) is a content hash of a factory tree: two trees made of the
+same factory classes with the same values have the same fingerprint. Fingerprints
+are cached on each factory of the tree and dropped when a field of the factory
+(or of one of its sub-factories) is assigned, so comparing unchanged subtrees is O(1).
+
+Usage:
+    if fingerprint(system.__config__) != fingerprint(new_config):
+        ...
+
+diff_factories(old, new) returns the differences between two factory trees keyed
+by path, identical subtrees are skipped by identity (and, on demand, by cached
+fingerprints).
+
+Note: the content of a field value modified in place (e.g. config.positions.append(1.0))
+is not seen by fingerprints, values must be assigned.
+"""
+import hashlib
+import marshal
+import weakref
+from enum import Enum
+from typing import Any, Dict, NamedTuple
+
+from pydantic import BaseModel
+
+from .system import (
+        BaseFactory, FactoryDict, FactoryList, MemberType, 
+        _ConfigState, _get_config_state, _is_same_value, join_path
+    )
+
+DIGEST_SIZE = 16
+
+_class_tags = weakref.WeakKeyDictionary()
+
+def _class_tag(cls: type) -> bytes:
+    """ a name identifying a class, a Config class is named after its System """
+    try:
+        return _class_tags[cls]
+    except (KeyError, TypeError):
+        pass
+    System = None
+    get_system_ref = getattr(cls, "__parent_system_class_ref__", None)
+    if get_system_ref is not None:
+        System = get_system_ref()
+    if System is not None:
+        tag = f"{System.__module__}.{System.__qualname__}.Config"
+    else:
+        tag = f"{cls.__module__}.{cls.__qualname__}"
+    tag = tag.encode()
+    try:
+        _class_tags[cls] = tag
+    except TypeError:
+        pass
+    return tag
+
+
+# values of these exact types are encoded by marshal as they are 
+_marshal_types = frozenset({int, float, complex, str, bytes, bool, type(None)})
+
+def _sorted_keys(d: dict) -> list:
+    try:
+        return sorted(d)
+    except TypeError:
+        return sorted(d, key=repr)
+
+def _normalize(value, parent: _ConfigState):
+    """ convert a field value to data marshal encodes deterministically 
+    
+    Sub-factories are replaced by their fingerprint, other objects are tagged 
+    tuples starting with Ellipsis. 
+    """
+    if type(value) in _marshal_types:
+        return value 
+    if isinstance(value, BaseFactory):
+        return (..., _fingerprint(value, parent))
+    simple = _marshal_types 
+    if isinstance(value, dict):
+        return {
+            (key if type(key) in simple else _normalize(key, parent)):
+            (item if type(item) in simple else _normalize(item, parent)) 
+            for key, item in ((key, value[key]) for key in _sorted_keys(value))
+        }
+    if isinstance(value, list):
+        return [item if type(item) in simple else _normalize(item, parent) for item in value]
+    if type(value) is tuple:
+        return tuple(_normalize(item, parent) for item in value)
+    if isinstance(value, Enum):
+        return (..., "E", _class_tag(type(value)), _normalize(value.value, parent))
+    if isinstance(value, (set, frozenset)):
+        return (..., "S", sorted(marshal.dumps(_normalize(item, parent), 2) for item in value))
+    if isinstance(value, BaseModel):
+        return (..., "M", _class_tag(type(value)), _normalize(value.__dict__, parent))
+    if isinstance(value, type):
+        return (..., "C", _class_tag(value))
+    return (..., "R", _class_tag(type(value)), repr(value))
+
+def _fingerprint(factory: BaseFactory, parent: _ConfigState = None) -> bytes:
+    state = _get_config_state(factory)
+    digest = state.fingerprint
+    if digest is None:
+        # marshal version 2 does not depend on object references 
+        data = marshal.dumps( (_class_tag(type(factory)), _normalize(factory.__dict__, state)), 2)
+        digest = state.fingerprint = hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+    if parent is not None:
+        # the parent fingerprint is dropped with this one
+        parent_ref = weakref.ref(parent)
+        if parent_ref not in state.parents:
+            state.parents.append(parent_ref)
+    return digest
+
+def fingerprint(factory: BaseFactory) -> str:
+    """ Return the content hash of a factory tree as an hexadecimal string
+
+    The fingerprint depends on the factory classes (by their module and name, a
+    System Config class by its System) and on the field values. Dictionaries are
+    hashed regardless of their order. Values which are not factories, basic python
+    types or pydantic models are hashed from their repr.
+    """
+    return _fingerprint(factory).hex()
+
+def same_tree(left: BaseFactory, right: BaseFactory) -> bool:
+    """ True if two factory trees have the same fingerprint, O(1) for cached fingerprints """
+    return left is right or _fingerprint(left) == _fingerprint(right)
+
+
+class FactoryChange(NamedTuple):
+    kind: str # "modified", "added", "removed" or "replaced" (by a factory of another class)
+    old: Any # None if added 
+    new: Any # None if removed 
+
+_MISSING = object()
+
+def _cached_fingerprint(factory: BaseFactory):
+    state = factory.__config_state__
+    if state is None or state.config_id != id(factory):
+        return None 
+    return state.fingerprint 
+
+def _is_same_tree(old: BaseFactory, new: BaseFactory) -> bool:
+    """ True if old and new have equal cached fingerprints """
+    old_fingerprint = _cached_fingerprint(old)
+    return old_fingerprint is not None and old_fingerprint == _cached_fingerprint(new)
+
+def _get_items(container):
+    if isinstance(container, (FactoryDict, FactoryList)):
+        return container.data 
+    return container 
+
+_leaf_classes = weakref.WeakKeyDictionary()
+
+def _is_leaf_class(cls) -> bool:
+    """ True if the fields of a factory class cannot hold factories, they are compared at once """
+    try:
+        return _leaf_classes[cls]
+    except KeyError:
+        pass 
+    leaf = all(member.member_type == MemberType.Other for member in cls.__member_types__.values()) 
+    _leaf_classes[cls] = leaf 
+    return leaf 
+
+class _Differ:
+    def __init__(self, trust_cache: bool = False):
+        self.changes: Dict[str, FactoryChange] = {}
+        self.trust_cache = trust_cache 
+    
+    def diff_value(self, path: str, old, new) -> None:
+        if old is new:
+            return 
+        if isinstance(old, BaseFactory) and isinstance(new, BaseFactory):
+            self.diff_factory(path, old, new)
+        elif not _is_same_value(old, new):
+            self.changes[path] = FactoryChange("modified", old, new)
+
+    def diff_factory(self, path: str, old: BaseFactory, new: BaseFactory) -> None:
+        if self.trust_cache and _is_same_tree(old, new):
+            return 
+        if type(old) is not type(new):
+            self.changes[path] = FactoryChange("replaced", old, new)
+        elif isinstance(old, FactoryDict):
+            self.diff_dict(path, old.data, new.data)
+        elif isinstance(old, FactoryList):
+            self.diff_list(path, old.data, new.data)
+        else:
+            self.diff_fields(path, old, new)
+    
+    def diff_fields(self, path: str, old: BaseFactory, new: BaseFactory) -> None:
+        member_types = type(old).__member_types__
+        old_values, new_values = old.__dict__, new.__dict__
+        if _is_leaf_class(type(old)) and old_values == new_values:
+            return 
+        names = list(old_values)
+        names.extend(name for name in new_values if name not in old_values)
+        for name in names:
+            old_value = old_values.get(name, _MISSING)
+            new_value = new_values.get(name, _MISSING)
+            if old_value is new_value:
+                continue 
+            field_path = join_path(path, name)
+            if old_value is _MISSING:
+                self.changes[field_path] = FactoryChange("added", None, new_value)
+                continue
+            if new_value is _MISSING:
+                self.changes[field_path] = FactoryChange("removed", old_value, None)
+                continue 
+            member = member_types.get(name, None)
+            member_type = member.member_type if member is not None else MemberType.Other 
+            # validated containers are plain dict and list, defaults are FactoryDict and FactoryList 
+            if member_type == MemberType.FactoryDict and isinstance(old_value, (dict, FactoryDict)) and isinstance(new_value, (dict, FactoryDict)):
+                self.diff_dict(field_path, _get_items(old_value), _get_items(new_value))
+            elif member_type == MemberType.FactoryList and isinstance(old_value, (list, FactoryList)) and isinstance(new_value, (list, FactoryList)):
+                self.diff_list(field_path, _get_items(old_value), _get_items(new_value))
+            else:
+                self.diff_value(field_path, old_value, new_value)
+    
+    def diff_dict(self, path: str, old: dict, new: dict) -> None:
+        item_name = FactoryDict._item_name 
+        for key, item in old.items():
+            if key not in new:
+                self.changes[item_name(path, key)] = FactoryChange("removed", item, None)
+        for key, item in new.items():
+            if key in old:
+                self.diff_value(item_name(path, key), old[key], item)
+            else:
+                self.changes[item_name(path, key)] = FactoryChange("added", None, item)
+    
+    def diff_list(self, path: str, old: list, new: list) -> None:
+        item_name = FactoryList._item_name 
+        for index in range(min(len(old), len(new))):
+            self.diff_value(item_name(path, index), old[index], new[index])
+        for index in range(len(new), len(old)):
+            self.changes[item_name(path, index)] = FactoryChange("removed", old[index], None)
+        for index in range(len(old), len(new)):
+            self.changes[item_name(path, index)] = FactoryChange("added", None, new[index])
+
+
+def diff_factories(old: BaseFactory, new: BaseFactory, path: str = "", trust_cache: bool = False) -> Dict[str, FactoryChange]:
+    """ Return the differences between two factory trees 
+
+    Differences are keyed by path, the path of a subsystem as built by the factories 
+    followed by the field name, e.g. "motors['x'].speed". Modified plain values 
+    are reported at the field path, sub-factories of another class and added or 
+    removed items of dictionaries and lists are reported at their own path. 
+
+    Subtrees which are the same object are skipped, all the others are compared 
+    value by value. 
+
+    Args:
+        old, new (BaseFactory): factory trees, e.g. system.__config__ and a config 
+            freshly loaded
+        path (str, optional): path of the root, e.g. system.__path__ 
+        trust_cache (bool, optional): if True the fingerprints of both trees are 
+            computed (or taken from the cache) and subtrees with equal fingerprints 
+            are skipped: diffing the same trees again after a few changes then only 
+            visits the modified branches. A cached fingerprint is only dropped when 
+            a field is assigned, changes made in place (e.g. list.append, 
+            __dict__ or construct) are missed. 
+    
+    Returns:
+        changes (dict[str, FactoryChange]): (kind, old, new) by path 
+    """
+    if trust_cache:
+        _fingerprint(old)
+        _fingerprint(new)
+    differ = _Differ(trust_cache)
+    differ.diff_value(path, old, new)
+    return differ.changes 
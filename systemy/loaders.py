@@ -1,148 +1,133 @@
 from enum import Enum
 from typing import List, Optional, Tuple
-from attr import dataclass
+from attr import dataclass, field
 import yaml
 from .system import BaseFactory, BaseSystem
-from py_expression_eval import Parser 
+from .registry import (
+        FactoryRegistry, 
+        factory_registry, 
+        split_factory_definition, 
+        register_factory, 
+        register_lazy_factory, 
+        get_factory_class, 
+        get_system_class, 
+        iter_factory, 
+        iter_system_class
+    )
+from functools import lru_cache, partial
+from collections import OrderedDict
+from contextvars import ContextVar
+from contextlib import contextmanager
+import threading
+import ast
+from types import CodeType
 import math 
 import re
 import os
-_math_parser  = Parser()
 _math_args = {k:v for k,v in math.__dict__.items() if not k.startswith("_")} 
-del Parser
 
-_factory_loockup = {}
-""" Dictionary containing all target """
+@lru_cache(maxsize=None)
+def _get_math_parser():
+    """ the math expression parser, py_expression_eval is imported on first use """
+    from py_expression_eval import Parser 
+    return Parser()
 
+MATH_CACHE_SIZE = 1024 
+""" Maximum number of !math expressions kept in the parse and value caches """
 
+class MathBackend(str, Enum):
+    COMPILED = "compiled" # expressions are compiled to python code  
+    INTERPRETED = "interpreted" # expressions are evaluated by py_expression_eval 
 
-def split_factory_definition(name):
-    # "Elt:Device/Motor"
-    # "Elt:Motor"
-    # "Motor"
-    # "Device/Motor"
-    left, _, right = name.partition(":")
-    if right:
-        namespace, kind_name = left, right
-    else:
-        namespace, kind_name = None, left 
-
-    left, _,  right = kind_name.partition("/")
-    if right:
-        kind, name = left, right 
-    else:
-        kind, name = None, left 
-    return namespace, kind, name
+_math_backend = MathBackend.INTERPRETED
 
+_factory_loockup = factory_registry._lookup 
+""" Dictionary containing all target (kept for compatibility, see FactoryRegistry) """
 
-def register_factory(name, cls=None, namespace=None, kind=None):
-    """ Record a factory with its name 
-    
-    Usage:
-        @register_factory(name) 
-        class MyFactory(BaseFactory):
-            ...
-
-        Or 
-
-        register_factory(name, MyFactory)
-
-    """
-    if isinstance(name, type) and cls is None:
-        name, cls = name.__name__, name
-       
-    
-    rns, rkind, rname = split_factory_definition(name)
-    if rns is not None:
-        if namespace:
-            raise ValueError("namespace is defined twice, from name and keyword")
-        else:
-            namespace = rns 
-            name = rname 
-    if rkind is not None:
-        if kind:
-            raise ValueError("kind is defined twice, from name and keyword")
-        else:
-            kind = rkind
-            name = rname
-     
-
-    def factory_recorder(icls):
-        if issubclass(icls, BaseSystem):
-            fcls = icls.Config
-        else:
-            fcls = icls 
-        if not hasattr(fcls, "build"):
-            raise ValueError("Factory must have a `build` method")
-        
-        _factory_loockup[ (None,None,name) ] = fcls
-        _factory_loockup[ (None,kind,name) ] = fcls 
-        _factory_loockup[ (namespace, kind, name) ] = fcls
-        _factory_loockup[ (namespace, None, name) ] = fcls
-
-        return icls
-    
-    if cls:
-        return factory_recorder(cls)
-    else:
-        return factory_recorder
-        
-
-def get_factory_class(name, namespace=None, kind=None) -> BaseFactory:
-       
-    rns, rkind, name = split_factory_definition(name)
-    namespace = namespace or rns 
-    kind = kind or rkind
-
-    try:
-        return _factory_loockup[(namespace,kind,name)]
-    except KeyError:
-        raise ValueError(f"Unknown factory {name!r} kind {kind!r} in namespace {namespace!r}")
-
-def get_system_class(name, namespace=None, kind=None):
-    Factory = get_factory_class(name, namespace=namespace, kind=kind)
-    System = Factory.get_system_class()
-    if System is None:
-        raise ValueError(f"Factory {name} exists but is not associated to any System")
-    return System 
-
-
-def iter_factory(kind: Optional[str]=None, namespace: Optional[str]=None):
-    for (ns,k,n), Factory in _factory_loockup.items():
-        if ns==namespace and k==kind:
-            yield n, Factory
-
-def iter_system_class(kind: Optional[str]=None, namespace: Optional[str]=None):
-    for n, Factory in iter_factory(kind=kind, namespace=namespace):
-        try:
-            System = Factory.get_system_class()
-        except ValueError:
-            pass
-        else:
-            yield n, System
 
 
 @dataclass
 class SystemIo:
     default_path: str = "." # default path definition if path environment var not found     
     path_env_name: str = "SYSTEMYPATH" # name of the environmnet variable defining path 
+    use_listing: bool = False # if True directories are listed once and lookups are done in the listing 
+    cache_misses: bool = False # if True files not found are cached as well 
+    
+    # resolution cache, file_name -> path or None if not found (cache_misses only)
+    _cache: dict = field(factory=dict, init=False, repr=False, eq=False)
+    # directory -> set of file names, used when use_listing is True  
+    _listings: dict = field(factory=dict, init=False, repr=False, eq=False)
+    # search path string for which the caches are valid 
+    _cached_path_string: Optional[str] = field(default=None, init=False, repr=False, eq=False)
+
+    def get_path_string(self) -> str:
+        return os.environ.get(self.path_env_name, self.default_path)
 
     def get_path_list(self) -> List[str]:
-        return os.environ.get(self.path_env_name, self.default_path).split(':')
+        return self.get_path_string().split(':')
+    
+    def clear_cache(self) -> None:
+        """ Clear the file resolution cache (and directory listings) 
+
+        The cache is automatically cleared when the search path changes, this must be 
+        called when files are added or removed from the search path.  
+        """
+        self._cache.clear()
+        self._listings.clear()
+        self._cached_path_string = None 
 
     def find(self, file_name: str):
         """ find a config file and return its absolute path 
         
+        Found paths are cached until the search path changes or clear_cache is called. 
+        A file not found is looked up again on the next call (directories are listed 
+        again) unless cache_misses is True. 
+
         Args:
             file_name (str): config file name. Should be inside one of the path defined by the $CFGPATH 
         """
-        path_list = self.get_path_list()
+        path_string = self.get_path_string()
+        if path_string != self._cached_path_string:
+            self.clear_cache()
+            self._cached_path_string = path_string
+        
+        try:
+            path = self._cache[file_name]
+        except KeyError:
+            path = self._find(file_name, path_string.split(':'))
+            if path is None and self.use_listing and not self.cache_misses:
+                # the file may have been created after the listing 
+                self._listings.clear()
+                path = self._find(file_name, path_string.split(':'))
+            if path is not None or self.cache_misses:
+                self._cache[file_name] = path 
         
+        if path is None:
+            raise ValueError('coud not find config file %r in any of %s'%(file_name, path_string.split(':')))
+        return path 
+
+    def _find(self, file_name: str, path_list: List[str]) -> Optional[str]:
+        listable = self.use_listing and not os.path.isabs(file_name) and os.sep not in file_name 
         for directory in path_list[::-1]:
             path = os.path.join(directory, file_name)
-            if os.path.exists(path):
+            if listable:
+                if file_name in self._get_listing(directory):
+                    return path 
+            elif os.path.exists(path):
                 return  path
-        raise ValueError('coud not find config file %r in any of %s'%(file_name, path_list))
+        return None 
+
+    def _get_listing(self, directory: str) -> frozenset:
+        try:
+            return self._listings[directory]
+        except KeyError:
+            pass 
+        try:
+            listing = frozenset(os.listdir(directory or "."))
+        except OSError:
+            listing = frozenset()
+        self._listings[directory] = listing
+        return listing 
 
     def resolve(self, path: str)-> Tuple[str, Tuple]:
         """ Return an absolute file name path and a tuple internal file path 
@@ -187,12 +172,346 @@ def factory_constructor(loader, tag_suffix, node):
 add_multi_constructor( YamlTags.FACTORY, factory_constructor)
 
 
+_math_binary_operators = {
+    '+': ast.Add, '-': ast.Sub, '*': ast.Mult, '/': ast.Div, '%': ast.Mod, 
+    '^': ast.Pow, '**': ast.Pow
+}
+_math_compare_operators = {
+    '==': ast.Eq, '!=': ast.NotEq, '>': ast.Gt, '<': ast.Lt, '>=': ast.GtE, '<=': ast.LtE, 
+    'in': ast.In
+}
+
+class _MathCompileError(ValueError):
+    pass 
+
+def _math_name(prefix: str, name: str) -> str:
+    """ a python identifier for a name or an operator of the math parser """
+    return "_"+prefix+"_"+"".join( c if c.isalnum() else "x%02x"%ord(c) for c in name) 
+
+@lru_cache(maxsize=None)
+def _get_math_namespace() -> dict:
+    """ namespace of compiled math expressions """
+    namespace = {'__builtins__': {}}
+    _math_parser = _get_math_parser()
+    namespace.update( (_math_name("o1", k), f) for k,f in _math_parser.ops1.items() )
+    namespace.update( (_math_name("o2", k), f) for k,f in _math_parser.ops2.items() )
+    namespace.update( (_math_name("f", k), f) for k,f in _math_parser.functions.items() )
+    namespace.update( (_math_name("v", k), v) for k,v in _math_args.items() )
+    return namespace
+
+def _compile_math(parsed) -> CodeType:
+    """ Compile a parsed expression into a python code object 
+    
+    Only a restricted set of nodes are generated (constants, names of the math namespace, 
+    calls, unary/binary operations, comparisons and lists) so the code is safe to evaluate.  
+    _MathCompileError is raised for any unsupported token.
+    """
+    from py_expression_eval import TFUNCALL, TNUMBER, TOP1, TOP2, TVAR
+    _math_parser = _get_math_parser()
+    stack = [] # ast nodes or list of ast nodes for comma separated arguments 
+    def pop_node():
+        node = stack.pop()
+        if isinstance(node, list):
+            return ast.List(elts=node, ctx=ast.Load())
+        return node 
+
+    for token in parsed.tokens:
+        if token.type_ == TNUMBER:
+            stack.append( ast.Constant(value=token.number_) )
+        elif token.type_ == TVAR:
+            if token.index_ in _math_args:
+                name = _math_name("v", token.index_)
+            elif token.index_ in _math_parser.functions:
+                name = _math_name("f", token.index_)
+            else:
+                raise _MathCompileError(f"undefined variable {token.index_}")
+            stack.append( ast.Name(id=name, ctx=ast.Load()) )
+        elif token.type_ == TOP1:
+            operand = pop_node()
+            if token.index_ == '-':
+                stack.append( ast.UnaryOp(op=ast.USub(), operand=operand) )
+            elif token.index_ == 'not':
+                stack.append( ast.UnaryOp(op=ast.Not(), operand=operand) )
+            elif token.index_ in _math_parser.ops1:
+                func = ast.Name(id=_math_name("o1", token.index_), ctx=ast.Load())
+                stack.append( ast.Call(func=func, args=[operand], keywords=[]) )
+            else:
+                raise _MathCompileError(f"unknown operator {token.index_}")
+        elif token.type_ == TOP2:
+            right = pop_node()
+            left = stack.pop()
+            if token.index_ == ',':
+                stack.append( (left if isinstance(left, list) else [left]) + [right] )
+                continue 
+            if isinstance(left, list):
+                left = ast.List(elts=left, ctx=ast.Load())
+            if token.index_ in _math_binary_operators:
+                stack.append( ast.BinOp(left=left, op=_math_binary_operators[token.index_](), right=right) )
+            elif token.index_ in _math_compare_operators:
+                stack.append( ast.Compare(left=left, ops=[_math_compare_operators[token.index_]()], comparators=[right]) )
+            elif token.index_ in _math_parser.ops2:
+                func = ast.Name(id=_math_name("o2", token.index_), ctx=ast.Load())
+                stack.append( ast.Call(func=func, args=[left, right], keywords=[]) )
+            else:
+                raise _MathCompileError(f"unknown operator {token.index_}")
+        elif token.type_ == TFUNCALL:
+            args = stack.pop()
+            func = pop_node()
+            if not isinstance(args, list):
+                args = [args]
+            stack.append( ast.Call(func=func, args=args, keywords=[]) )
+        else:
+            raise _MathCompileError("invalid expression")
+    if len(stack) != 1:
+        raise _MathCompileError("invalid expression (parity)")
+    
+    tree = ast.fix_missing_locations( ast.Expression(body=pop_node()) )
+    return compile(tree, "<math>", "eval")
+
+
+@lru_cache(maxsize=MATH_CACHE_SIZE)
+def _parse_math(expression: str):
+    """ return an evaluator of the expression and a flag True if the expression is constant """
+    from py_expression_eval import TOP2, TVAR
+    parsed = _get_math_parser().parse(expression)
+    
+    constant = True 
+    for token in parsed.tokens:
+        # random() and the dice roll operator are the only non constant parts 
+        if token.type_ == TVAR and token.index_ == "random" and "random" not in _math_args:
+            constant = False 
+        if token.type_ == TOP2 and token.index_ == "D":
+            constant = False 
+    
+    if _math_backend == MathBackend.COMPILED:
+        try:
+            code = _compile_math(parsed)
+        except _MathCompileError:
+            pass 
+        else:
+            return partial(eval, code, _get_math_namespace()), constant 
+    return partial(parsed.evaluate, _math_args), constant 
+
+@lru_cache(maxsize=MATH_CACHE_SIZE)
+def _eval_constant_math(expression: str):
+    evaluate, _ = _parse_math(expression)
+    return evaluate()
+
+def set_math_backend(backend: MathBackend) -> None:
+    """ Set how !math expressions are evaluated: "interpreted" (default) or "compiled"
+
+    The compiled backend translates expressions into python code and falls back to 
+    the py_expression_eval interpreter for unsupported expressions. Compilation is slower 
+    than one interpretation but evaluation is several times faster: it is worth when 
+    the same non-constant expressions are evaluated many times (constant expressions 
+    are evaluated only once anyway). See benchmarks/bench_math.py 
+    """
+    global _math_backend
+    _math_backend = MathBackend(backend)
+    clear_math_cache()
+
+def eval_math(expression: str):
+    """ Evaluate a math expression as the !math tag does 
+
+    Parsed expressions are cached and constant expressions are evaluated once 
+    per unique expression string. 
+    """
+    evaluate, constant = _parse_math(expression)
+    if not constant:
+        _set_include_volatile()
+        return evaluate()
+    value = _eval_constant_math(expression)
+    if isinstance(value, list):
+        return list(value)
+    return value 
+
+def math_cache_info() -> dict:
+    """ Return the cache statistics of !math expressions 
+    
+    A dictionary with 'parse' and 'value' keys, values are named tuple 
+    (hits, misses, maxsize, currsize) 
+    """
+    return {'parse': _parse_math.cache_info(), 'value': _eval_constant_math.cache_info()}
+
+def clear_math_cache() -> None:
+    """ Clear the parse and value caches of !math expressions """
+    _parse_math.cache_clear()
+    _eval_constant_math.cache_clear()
+
 def math_constructor(loader, node):
-    return _math_parser.parse(loader.construct_scalar(node)).evaluate(_math_args)
+    return eval_math(loader.construct_scalar(node))
 add_constructor( YamlTags.MATH, math_constructor)
 
 
 
+INCLUDE_CACHE_SIZE = 256
+""" Maximum number of parsed include files kept in cache """
+
+_include_cache = OrderedDict() # (Loader, search path, abs file name, path) -> (dependencies, factory) 
+_include_cache_lock = threading.Lock()
+_include_dependencies = ContextVar("_include_dependencies", default=None)
+# [flag] of the include being loaded, set when a non constant !math is evaluated 
+_include_volatile = ContextVar("_include_volatile", default=None)
+
+def _set_include_volatile() -> None:
+    volatile = _include_volatile.get()
+    if volatile is not None:
+        volatile[0] = True 
+
+def _get_file_stamp(file_name: str) -> Tuple[int, int]:
+    stat = os.stat(file_name)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _is_up_to_date(dependencies: dict) -> bool:
+    try:
+        return all( _get_file_stamp(f) == stamp for f, stamp in dependencies.items() )
+    except OSError:
+        return False 
+
+def _record_dependencies(dependencies: dict) -> None:
+    """ record files read by an include into the include being loaded (if any) """
+    parent_dependencies = _include_dependencies.get()
+    if parent_dependencies is not None:
+        parent_dependencies.update(dependencies)
+
+def _walk_node(node: yaml.Node, path: Tuple[str, ...]) -> yaml.Node:
+    """ return the node located at path inside a composed yaml node """
+    for i, key in enumerate(path):
+        if isinstance(node, yaml.MappingNode):
+            for key_node, value_node in node.value:
+                if isinstance(key_node, yaml.ScalarNode) and key_node.value == key:
+                    node = value_node
+                    break 
+            else:
+                raise ValueError(f"cannot find {'.'.join(path[:i+1])!r}")
+        elif isinstance(node, yaml.SequenceNode) and key.lstrip("-").isdigit():
+            try:
+                node = node.value[int(key)]
+            except IndexError:
+                raise ValueError(f"cannot find {'.'.join(path[:i+1])!r}")
+        else:
+            raise ValueError(f"cannot find {'.'.join(path[:i+1])!r}, parent is not a map or a sequence")
+    return node 
+
+def _load_file(file_name: str, Loader, path: Optional[Tuple[str, ...]] = None):
+    """ load a yaml file, if path is given only the targeted node is constructed """
+    with open(file_name, "r") as f :
+        text = f.read()
+    if not path:
+        return yaml.load(text, Loader)
+    
+    loader = Loader(text)
+    try:
+        node = loader.get_single_node()
+        if node is None:
+            raise ValueError(f"file {file_name!r} is empty")
+        try:
+            node = _walk_node(node, path)
+        except ValueError as e:
+            raise ValueError(f"in file {file_name!r}: {e}") from None 
+        return loader.construct_document(node)
+    finally:
+        loader.dispose()
+
+
+@contextmanager
+def record_dependencies():
+    """ Context manager recording the files read by load_include inside the context 
+
+    Yield a dictionary of absolute file name -> (mtime_ns, size) filled on the fly 
+    """
+    dependencies = {}
+    token = _include_dependencies.set(dependencies)
+    try:
+        yield dependencies 
+    finally:
+        _include_dependencies.reset(token)
+        _record_dependencies(dependencies)
+
+
+@contextmanager
+def record_volatile():
+    """ Context manager telling if a non constant !math expression was evaluated inside the context 
+
+    Yield a list [flag], flag is set to True on the fly. Such a configuration gives 
+    another result at each load. 
+    """
+    volatile = [False]
+    token = _include_volatile.set(volatile)
+    try:
+        yield volatile 
+    finally:
+        _include_volatile.reset(token)
+        if volatile[0]:
+            _set_include_volatile()
+
+
+def load_include(file_name: str, Loader=None, path: Optional[Tuple[str, ...]] = None) -> BaseFactory:
+    """ Load an include file, parsed files are cached 
+
+    The cache is invalidated when the modification time or the size of the file (or of 
+    any file it includes) changes. Files are cached per search path of Loader.io and 
+    files evaluating a non constant !math expression (e.g. random()) are not cached. 
+    The returned factory is the cached one and must not be modified, include_constructor 
+    is making a copy for each include site. 
+
+    Args:
+        file_name (str): yaml file name 
+        Loader (optional): yaml loader class, default is SystemLoader 
+        path (tuple, optional): path of the factory inside the file, e.g. ("a", "b"). 
+            Only this node is constructed.
+    """
+    if Loader is None:
+        Loader = SystemLoader
+    abs_file_name = os.path.abspath(file_name)
+    key = (Loader, Loader.io.get_path_string(), abs_file_name, tuple(path or ()))
+    
+    with _include_cache_lock:
+        cached = _include_cache.get(key)
+    if cached is not None and _is_up_to_date(cached[0]):
+        with _include_cache_lock:
+            if key in _include_cache:
+                _include_cache.move_to_end(key)
+        _record_dependencies(cached[0])
+        return cached[1]
+    
+    dependencies = {abs_file_name: _get_file_stamp(abs_file_name)}
+    token = _include_dependencies.set(dependencies)
+    try:
+        # a volatile file makes the including file volatile as well 
+        with record_volatile() as volatile:
+            src = _load_file(file_name, Loader, path)
+    finally:
+        _include_dependencies.reset(token)
+
+    if not isinstance( src, BaseFactory):
+        raise ValueError("Include file must be factory")
+    
+    if not volatile[0]:
+        with _include_cache_lock:
+            _include_cache[key] = (dependencies, src)
+            while len(_include_cache) > INCLUDE_CACHE_SIZE:
+                _include_cache.popitem(last=False)
+    _record_dependencies(dependencies)
+    return src 
+
+def clear_include_cache(file_name: Optional[str] = None) -> None:
+    """ Invalidate the cache of included files 
+
+    Args:
+        file_name (str, optional): invalidate only this file (and any file including it). 
+            By default the whole cache is cleared 
+    """
+    with _include_cache_lock:
+        if file_name is None:
+            _include_cache.clear()
+            return
+        file_name = os.path.abspath(file_name)
+        for key, (dependencies, _) in list(_include_cache.items()):
+            if file_name in dependencies:
+                del _include_cache[key]
+
+
 def include_constructor(loader, tag_suffix, node):
     if isinstance(node, yaml.MappingNode):
         data = loader.construct_mapping(node)
@@ -206,12 +525,8 @@ def include_constructor(loader, tag_suffix, node):
     
     file_name, path = io.resolve(tag_suffix.strip())
     
-    
-    with open(file_name, "r") as f :
-        src = yaml.load(f.read(), loader.__class__)
-    
-    if not isinstance( src, BaseFactory):
-        raise ValueError("Include file must be factory")
+    # the cached factory is shared, each include site is working on its own copy 
+    src = load_include(file_name, loader.__class__, path).copy(deep=True)
     
     for k,v in data.items():
         setattr( src, k, v)
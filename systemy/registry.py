@@ -0,0 +1,331 @@
+""" Registry of named factories
+
+A factory is registered with a name optionally prefixed by a namespace and a kind:
+"Namespace:Kind/Name". It can then be retrieved with any of "Name", "Kind/Name",
+"Namespace:Name" or "Namespace:Kind/Name".
+"""
+import importlib
+import threading
+import warnings
+from operator import attrgetter
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from .system import BaseFactory, BaseSystem
+
+FactoryKey = Tuple[Optional[str], Optional[str], str]
+
+ENTRY_POINT_GROUP = "systemy.factories"
+""" Entry point group of lazy factories, entry point name is the factory name e.g. 'Elt:Motor' """
+
+
+class FactoryOverwriteWarning(UserWarning):
+    """ A factory is registered with a (namespace, kind, name) already used by another factory """
+
+class FactoryConflict(NamedTuple):
+    key: FactoryKey
+    old: Type[BaseFactory]
+    new: Type[BaseFactory]
+
+
+def split_factory_definition(name):
+    # "Elt:Device/Motor"
+    # "Elt:Motor"
+    # "Motor"
+    # "Device/Motor"
+    left, _, right = name.partition(":")
+    if right:
+        namespace, kind_name = left, right
+    else:
+        namespace, kind_name = None, left
+
+    left, _,  right = kind_name.partition("/")
+    if right:
+        kind, name = left, right
+    else:
+        kind, name = None, left
+    return namespace, kind, name
+
+
+def _import_factory(target: str) -> Type[BaseFactory]:
+    """ import a factory from a "module:attr" target, a System class is replaced by its Config """
+    module_name, _, attr = target.partition(":")
+    obj = attrgetter(attr)(importlib.import_module(module_name))
+    if isinstance(obj, type) and issubclass(obj, BaseSystem):
+        obj = obj.Config
+    if not hasattr(obj, "build"):
+        raise ValueError(f"{target!r} is not a factory, it must have a `build` method")
+    return obj 
+
+def _iter_entry_points(group: str):
+    try:
+        from importlib.metadata import entry_points
+    except ImportError: # python < 3.8
+        try:
+            from importlib_metadata import entry_points
+        except ImportError:
+            return iter([])
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return iter(eps.select(group=group))
+    return iter(eps.get(group, []))
+
+
+def _iter_short_keys(namespace, kind, name) -> Iterator[FactoryKey]:
+    """ iterate over all the keys a factory can be found with """
+    yield (None, None, name)
+    yield (None, kind, name)
+    yield (namespace, kind, name)
+    yield (namespace, None, name)
+
+
+class FactoryRegistry:
+    """ Factory classes indexed by (namespace, kind, name)
+
+    Factories are also indexed by (namespace, kind) so listing the factories of
+    one namespace or kind does not scan the whole registry. Resolved tag strings
+    (e.g. "Elt:Motor") are cached until the next registration.
+
+    When a factory replaces another one under the same key the replacement is
+    recorded in `conflicts`. Replacing a factory registered with the very same
+    namespace, kind and name issues a FactoryOverwriteWarning.
+
+    Factories can also be registered lazily by their location "module:attr",
+    either with register_lazy or as package entry points of the group 
+    ENTRY_POINT_GROUP. The module is imported when the name is resolved for the 
+    first time. Entry points are read (without importing them) on the first 
+    name which is not found. 
+    """
+    def __init__(self):
+        self._lookup: Dict[FactoryKey, Type[BaseFactory]] = {}
+        self._scopes: Dict[Tuple[Optional[str], Optional[str]], Dict[str, Type[BaseFactory]]] = {}
+        self._keys: Dict[Type[BaseFactory], FactoryKey] = {}
+        self._resolved: Dict[Tuple[str, Optional[str], Optional[str]], Type[BaseFactory]] = {}
+        self._lazy: Dict[FactoryKey, Tuple[str, FactoryKey]] = {}
+        self._lazy_scopes: Dict[Tuple[Optional[str], Optional[str]], Dict[str, FactoryKey]] = {}
+        self._entry_points_loaded = False
+        self._lock = threading.RLock()
+        self.conflicts: List[FactoryConflict] = []
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key: FactoryKey) -> bool:
+        return key in self._lookup or key in self._lazy
+
+    def register(self, Factory: Type[BaseFactory], name: str, namespace: Optional[str] = None, kind: Optional[str] = None) -> None:
+        """ Record a factory class under name, namespace and kind """
+        full_key = (namespace, kind, name)
+        with self._lock:
+            for key in _iter_short_keys(*full_key):
+                old = self._lookup.get(key)
+                if old is not None and old is not Factory:
+                    self.conflicts.append( FactoryConflict(key, old, Factory) )
+                    if key == full_key:
+                        warnings.warn(
+                            f"factory {old.__qualname__} registered as {self.key_to_tag(key)!r} is replaced by {Factory.__qualname__}",
+                            FactoryOverwriteWarning, stacklevel=3
+                        )
+                self._lookup[key] = Factory
+                self._scopes.setdefault(key[:2], {})[name] = Factory
+            self._keys[Factory] = full_key
+            self._resolved.clear()
+
+    def register_lazy(self, target: str, name: str, namespace: Optional[str] = None, kind: Optional[str] = None) -> None:
+        """ Record the location "module:attr" of a factory, the module is imported on first use 
+
+        A factory registered normally under the same key always wins over a lazy one.
+        """
+        module_name, _, attr = target.partition(":")
+        if not module_name or not attr:
+            raise ValueError(f"lazy factory target must be 'module:attr', got {target!r}")
+        full_key = (namespace, kind, name)
+        with self._lock:
+            for key in _iter_short_keys(*full_key):
+                self._lazy[key] = (target, full_key)
+                self._lazy_scopes.setdefault(key[:2], {})[name] = key 
+            self._resolved.clear()
+    
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP) -> None:
+        """ Register lazily all factories declared as entry points, nothing is imported """
+        for entry_point in _iter_entry_points(group):
+            namespace, kind, name = split_factory_definition(entry_point.name)
+            self.register_lazy(entry_point.value, name, namespace, kind)
+    
+    def _ensure_entry_points(self) -> None:
+        with self._lock:
+            if self._entry_points_loaded:
+                return 
+            self._entry_points_loaded = True 
+        self.load_entry_points()
+
+    def _load_lazy(self, key: FactoryKey) -> Optional[Type[BaseFactory]]:
+        self._ensure_entry_points()
+        try:
+            target, full_key = self._lazy[key]
+        except KeyError:
+            return None 
+        # the import is done outside the lock, the module is likely registering factories 
+        Factory = _import_factory(target)
+        with self._lock:
+            if self._lookup.get(full_key) is not Factory:
+                self.register(Factory, full_key[2], full_key[0], full_key[1])
+            for short_key in _iter_short_keys(*full_key):
+                if self._lazy.get(short_key, (None,))[0] == target:
+                    del self._lazy[short_key]
+                    del self._lazy_scopes[short_key[:2]][short_key[2]]
+        return Factory 
+
+    def get(self, name: str, namespace: Optional[str] = None, kind: Optional[str] = None) -> Type[BaseFactory]:
+        """ Return a factory class from its name, e.g. 'Motor', 'Elt:Motor', 'Elt:Device/Motor'
+
+        Raises:
+            ValueError: if the factory is not registered
+        """
+        resolved_key = (name, namespace, kind)
+        try:
+            return self._resolved[resolved_key]
+        except KeyError:
+            pass
+        rns, rkind, rname = split_factory_definition(name)
+        key = (namespace or rns, kind or rkind, rname)
+        try:
+            Factory = self._lookup[key]
+        except KeyError:
+            Factory = self._load_lazy(key)
+        if Factory is None:
+            raise ValueError(f"Unknown factory {key[2]!r} kind {key[1]!r} in namespace {key[0]!r}")
+        self._resolved[resolved_key] = Factory
+        return Factory
+
+    def get_key(self, Factory: Type[BaseFactory]) -> Optional[FactoryKey]:
+        """ Return the (namespace, kind, name) of the last registration of a factory class or None """
+        return self._keys.get(Factory, None)
+
+    def iter(self, kind: Optional[str] = None, namespace: Optional[str] = None) -> Iterator[Tuple[str, Type[BaseFactory]]]:
+        """ Iterate over (name, Factory) registered with exactly this kind and namespace
+
+        With kind and namespace both None, all factories are listed by their short names.
+        Lazy factories of this scope are imported. 
+        """
+        self._ensure_entry_points()
+        for key in list(self._lazy_scopes.get((namespace, kind), {}).values()):
+            if key not in self._lookup:
+                self._load_lazy(key)
+        return iter(list(self._scopes.get((namespace, kind), {}).items()))
+
+    def iter_names(self, kind: Optional[str] = None, namespace: Optional[str] = None) -> Iterator[str]:
+        """ Iterate over names registered with exactly this kind and namespace, nothing is imported """
+        self._ensure_entry_points()
+        names = set(self._scopes.get((namespace, kind), {}))
+        names.update(self._lazy_scopes.get((namespace, kind), {}))
+        return iter(sorted(names))
+
+    def iter_namespaces(self) -> Iterator[str]:
+        self._ensure_entry_points()
+        scopes = set(self._scopes).union(self._lazy_scopes)
+        return iter(sorted({ns for ns, _ in scopes if ns is not None}))
+
+    def iter_kinds(self, namespace: Optional[str] = None) -> Iterator[str]:
+        self._ensure_entry_points()
+        scopes = set(self._scopes).union(self._lazy_scopes)
+        return iter(sorted({k for ns, k in scopes if ns == namespace and k is not None}))
+
+    @staticmethod
+    def key_to_tag(key: FactoryKey) -> str:
+        namespace, kind, name = key
+        if kind is not None:
+            name = kind+"/"+name
+        if namespace is not None:
+            name = namespace+":"+name
+        return name
+
+
+factory_registry = FactoryRegistry()
+
+
+def register_factory(name, cls=None, namespace=None, kind=None):
+    """ Record a factory with its name
+
+    Usage:
+        @register_factory(name)
+        class MyFactory(BaseFactory):
+            ...
+
+        Or
+
+        register_factory(name, MyFactory)
+
+    """
+    if isinstance(name, type) and cls is None:
+        name, cls = name.__name__, name
+
+
+    rns, rkind, rname = split_factory_definition(name)
+    if rns is not None:
+        if namespace:
+            raise ValueError("namespace is defined twice, from name and keyword")
+        else:
+            namespace = rns
+            name = rname
+    if rkind is not None:
+        if kind:
+            raise ValueError("kind is defined twice, from name and keyword")
+        else:
+            kind = rkind
+            name = rname
+
+
+    def factory_recorder(icls):
+        if issubclass(icls, BaseSystem):
+            fcls = icls.Config
+        else:
+            fcls = icls
+        if not hasattr(fcls, "build"):
+            raise ValueError("Factory must have a `build` method")
+
+        factory_registry.register(fcls, name, namespace, kind)
+        return icls
+
+    if cls:
+        return factory_recorder(cls)
+    else:
+        return factory_recorder
+
+
+def register_lazy_factory(name: str, target: str, namespace: Optional[str] = None, kind: Optional[str] = None) -> None:
+    """ Record a factory by its location, its module is imported only when the name is first resolved 
+
+    Usage:
+        register_lazy_factory("Elt:Motor", "mypackage.motor:Motor")
+    
+    Factories can also be declared as entry points of the "systemy.factories" group, 
+    e.g. in pyproject.toml:
+        [project.entry-points."systemy.factories"]
+        "Elt:Motor" = "mypackage.motor:Motor"
+    """
+    rns, rkind, name = split_factory_definition(name)
+    factory_registry.register_lazy(target, name, namespace or rns, kind or rkind)
+
+
+def get_factory_class(name, namespace=None, kind=None) -> BaseFactory:
+    return factory_registry.get(name, namespace, kind)
+
+def get_system_class(name, namespace=None, kind=None):
+    Factory = get_factory_class(name, namespace=namespace, kind=kind)
+    System = Factory.get_system_class()
+    if System is None:
+        raise ValueError(f"Factory {name} exists but is not associated to any System")
+    return System
+
+
+def iter_factory(kind: Optional[str]=None, namespace: Optional[str]=None):
+    return factory_registry.iter(kind=kind, namespace=namespace)
+
+def iter_system_class(kind: Optional[str]=None, namespace: Optional[str]=None):
+    for n, Factory in iter_factory(kind=kind, namespace=namespace):
+        try:
+            System = Factory.get_system_class()
+        except ValueError:
+            pass
+        else:
+            yield n, System
@@ -0,0 +1,232 @@
+""" Binary snapshot of configurations loaded from yaml files 
+
+A snapshot holds a fully resolved factory tree (after !factory, !include and !math 
+are processed) encoded with marshal, together with a manifest of every source file. 
+Factories are recorded by their registered name (see register_factory) and their 
+field values, so a snapshot is only usable when the same factories are registered. 
+
+Usage:
+    factory = load_config("my_system.yaml") # use the snapshot when up to date 
+"""
+import hashlib
+import marshal
+import os
+import sys
+import warnings
+from typing import Any, Dict, Optional, Tuple
+
+from .loaders import SystemLoader, load_include, record_dependencies, record_volatile
+from .registry import factory_registry
+from .system import BaseFactory, FactoryDict, FactoryList
+
+SNAPSHOT_VERSION = 1 
+_MAGIC = b"SYSTEMY-SNAPSHOT\n"
+
+class SnapshotError(ValueError):
+    """ Raised when a factory tree cannot be written or read as a snapshot """
+
+class _VolatileConfigError(SnapshotError):
+    """ the configuration is not the same at each load, see compile_snapshot """
+
+
+def _file_hash(file_name: str) -> str:
+    with open(file_name, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _make_manifest(dependencies: Dict[str, Tuple[int, int]]) -> Dict[str, Tuple[int, int, str]]:
+    return {f:(mtime, size, _file_hash(f)) for f,(mtime, size) in dependencies.items()}
+
+def _is_manifest_up_to_date(manifest: Dict[str, Tuple[int, int, str]]) -> bool:
+    for file_name, (mtime, size, file_hash) in manifest.items():
+        try:
+            stat = os.stat(file_name)
+            if (stat.st_mtime_ns, stat.st_size) == (mtime, size):
+                continue 
+            if stat.st_size != size or _file_hash(file_name) != file_hash:
+                return False 
+        except OSError:
+            return False 
+    return True 
+
+
+def _get_registered_key(Factory: type) -> Optional[Tuple]:
+    """ return the registered (namespace, kind, name) key of a factory class if it still resolves to it """
+    key = factory_registry.get_key(Factory)
+    if key is not None and key in factory_registry and factory_registry.get(key[2], key[0], key[1]) is Factory:
+        return key 
+    return None 
+
+
+def _encode(value):
+    if isinstance(value, FactoryDict):
+        return ("D", {k:_encode(v) for k,v in value.items()})
+    if isinstance(value, FactoryList):
+        return ("L", [_encode(v) for v in value])
+    if isinstance(value, BaseFactory):
+        fields = {k:_encode(getattr(value, k)) for k in value.__fields_set__}
+        key = _get_registered_key(type(value))
+        if key is None:
+            # not registered, the validation of the parent will rebuild it from a dict 
+            return ("d", fields)
+        return ("F", key, fields)
+    if isinstance(value, dict):
+        return ("d", {k:_encode(v) for k,v in value.items()})
+    if isinstance(value, list):
+        return ("l", [_encode(v) for v in value])
+    if isinstance(value, tuple):
+        return ("t", [_encode(v) for v in value])
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        return ("v", value)
+    raise SnapshotError(f"cannot snapshot a value of type {type(value).__name__}")
+
+
+def _decode(encoded, trusted: bool = False):
+    tag = encoded[0]
+    if tag == "v":
+        return encoded[1]
+    if tag == "F":
+        namespace, kind, name = encoded[1]
+        try:
+            Factory = factory_registry.get(name, namespace, kind)
+        except ValueError:
+            raise SnapshotError(f"factory {encoded[1]} is not registered")
+        values = {k:_decode(v, trusted) for k,v in encoded[2].items()}
+        return Factory.parse_trusted(values) if trusted else Factory.parse_obj(values)
+    if tag == "D":
+        items = {k:_decode(v, trusted) for k,v in encoded[1].items()}
+        return FactoryDict.parse_trusted(items) if trusted else FactoryDict(items)
+    if tag == "L":
+        items = [_decode(v, trusted) for v in encoded[1]]
+        return FactoryList.parse_trusted(items) if trusted else FactoryList(items)
+    if tag == "d":
+        return {k:_decode(v, trusted) for k,v in encoded[1].items()}
+    if tag == "l":
+        return [_decode(v, trusted) for v in encoded[1]]
+    if tag == "t":
+        return tuple(_decode(v, trusted) for v in encoded[1])
+    raise SnapshotError(f"invalid snapshot tag {tag!r}")
+
+
+def _resolve(file_name: str, Loader) -> Tuple[str, Optional[Tuple[str, ...]]]:
+    file_name, path = Loader.io.resolve(file_name)
+    return os.path.abspath(file_name), path 
+
+def default_snapshot_file(file_name: str, path: Optional[Tuple[str, ...]] = None) -> str:
+    """ default snapshot file name of a config file: the file name + '.snapshot' 
+    
+    The path inside the file is part of the name: "file.yaml(a.b).snapshot" 
+    """
+    if path:
+        file_name = f"{file_name}({'.'.join(path)})"
+    return file_name+".snapshot"
+
+
+def compile_snapshot(file_name: str, snapshot_file: Optional[str] = None, Loader=None) -> BaseFactory:
+    """ Load a configuration file from yaml and write its snapshot 
+
+    A configuration evaluating non constant !math expressions (e.g. random()) gives 
+    another result at each load, its snapshot is not written and SnapshotError is raised. 
+
+    Args:
+        file_name (str): config file name, resolved as an include (e.g. "file.yaml(a.b)")
+        snapshot_file (str, optional): default is given by default_snapshot_file 
+        Loader (optional): yaml loader class, default is SystemLoader 
+    
+    Returns:
+        factory (BaseFactory): the loaded factory 
+    """
+    Loader = Loader or SystemLoader
+    real_file_name, path = _resolve(file_name, Loader)
+    if snapshot_file is None:
+        snapshot_file = default_snapshot_file(real_file_name, path)
+    
+    with record_dependencies() as dependencies, record_volatile() as volatile:
+        factory = load_include(real_file_name, Loader, path).copy(deep=True)
+    
+    if volatile[0]:
+        raise _VolatileConfigError(f"{file_name!r} has non constant !math values")
+    if _get_registered_key(type(factory)) is None:
+        raise SnapshotError(f"the root factory {type(factory).__name__} is not registered")
+    data = {
+        'version': SNAPSHOT_VERSION, 
+        'python': tuple(sys.version_info[:2]), 
+        'source': (real_file_name, path), 
+        'search_path': Loader.io.get_path_string(), 
+        'manifest': _make_manifest(dependencies), 
+        'root': _encode(factory), 
+    }
+    tmp_file = snapshot_file+".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(_MAGIC)
+        marshal.dump(data, f)
+    os.replace(tmp_file, snapshot_file)
+    return factory 
+
+
+def _read_snapshot(snapshot_file: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(snapshot_file, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                return None 
+            data = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None 
+    if data.get('version') != SNAPSHOT_VERSION or data.get('python') != tuple(sys.version_info[:2]):
+        return None 
+    return data 
+
+
+def load_snapshot(snapshot_file: str, Loader=None, file_name: Optional[str] = None, trusted: bool = False) -> Optional[BaseFactory]:
+    """ Load a factory from a snapshot, None is returned if the snapshot is missing or out of date 
+
+    Args:
+        snapshot_file (str): snapshot file name 
+        Loader (optional): yaml loader class used to resolve files, default is SystemLoader 
+        file_name (str, optional): if given, the snapshot must have been compiled from this file
+        trusted (bool, optional): if True factories are constructed without pydantic 
+            validation. Only for snapshots written by compile_snapshot from a trusted source. 
+    """
+    Loader = Loader or SystemLoader
+    data = _read_snapshot(snapshot_file)
+    if data is None:
+        return None 
+    if file_name is not None and tuple(data['source']) != _resolve(file_name, Loader):
+        return None 
+    if data['search_path'] != Loader.io.get_path_string():
+        return None 
+    if not _is_manifest_up_to_date(data['manifest']):
+        return None 
+    try:
+        return _decode(data['root'], trusted)
+    except SnapshotError:
+        return None 
+
+
+def load_config(file_name: str, snapshot_file: Optional[str] = None, Loader=None, trusted: bool = False) -> BaseFactory:
+    """ Load a configuration file, using its snapshot when up to date 
+
+    If the snapshot is missing or out of date, the file is loaded from yaml 
+    and the snapshot is (re)written. A configuration with non constant !math 
+    values (e.g. random()) is always loaded from yaml. 
+    
+    Args:
+        file_name (str): config file name, resolved as an include (e.g. "file.yaml(a.b)")
+        snapshot_file (str, optional): default is given by default_snapshot_file 
+        Loader (optional): yaml loader class, default is SystemLoader 
+        trusted (bool, optional): if True the snapshot is loaded without validation (see load_snapshot)
+    """
+    Loader = Loader or SystemLoader
+    if snapshot_file is None:
+        snapshot_file = default_snapshot_file(*_resolve(file_name, Loader))
+    
+    factory = load_snapshot(snapshot_file, Loader, file_name, trusted)
+    if factory is not None:
+        return factory 
+    try:
+        return compile_snapshot(file_name, snapshot_file, Loader)
+    except _VolatileConfigError:
+        pass 
+    except (SnapshotError, OSError) as e:
+        warnings.warn(f"snapshot of {file_name!r} not written: {e}")
+    real_file_name, path = _resolve(file_name, Loader)
+    return load_include(real_file_name, Loader, path).copy(deep=True)
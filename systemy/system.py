@@ -1,13 +1,36 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from operator import attrgetter
+import importlib
+import inspect
+import itertools
+import re
+import sys
 from enum import Enum
 from pydantic import create_model, Field, BaseModel
+import threading
 import weakref 
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, get_type_hints
-from collections import UserDict, UserList
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Type, get_type_hints
+from collections import OrderedDict, UserDict, UserList
 
 from pydantic.config import Extra
+from pydantic.error_wrappers import ErrorWrapper, ValidationError
 from pydantic.fields import PrivateAttr
 
+if TYPE_CHECKING:
+    from concurrent.futures import Executor 
+
+# asyncio and concurrent.futures are slow to import, they are imported on first use 
+def _lazy_import(name: str):
+    """ return the module name, imported on the first call """
+    try:
+        return sys.modules[name]
+    except KeyError:
+        return importlib.import_module(name)
+
 
 
 class MemberType(Enum):
@@ -30,6 +53,22 @@ def _get_field_type(field)->MemberType:
         return MemberType.Other
     
 
+class MemberInfo(NamedTuple):
+    """ classification of a Config field, see BaseFactory.__member_types__ """
+    member_type: MemberType 
+    system_class: Optional[type] # System class built by the field factories, None if unknown 
+
+def _get_member_info(field) -> MemberInfo:
+    member_type = _get_field_type(field)
+    if member_type == MemberType.Other:
+        return MemberInfo(member_type, None)
+    try:
+        System = field.type_.get_system_class()
+    except ValueError:
+        System = None 
+    return MemberInfo(member_type, System)
+
+
 def _class_to_model_args(Cls: Type) -> dict:
     """ return dictionary of argument for a model creation and from regular class """     
     type_hints = get_type_hints(Cls)
@@ -47,14 +86,355 @@ def _class_to_model_args(Cls: Type) -> dict:
     return kwargs
 
 
+def _construct_trusted_factory(Factory: Type["BaseFactory"], value):
+    """ construct a factory from a dictionary without validation """
+    if isinstance(value, dict) and not inspect.isabstract(Factory):
+        return Factory.parse_trusted(value)
+    return value 
+
+_alias_names = weakref.WeakKeyDictionary() # factory class -> {alias: field name}
+
+def _get_alias_names(Factory: Type["BaseFactory"]) -> Dict[str, str]:
+    try:
+        return _alias_names[Factory]
+    except KeyError:
+        pass 
+    aliases = {field.alias:name for name, field in Factory.__fields__.items() if field.alias != name}
+    _alias_names[Factory] = aliases 
+    return aliases 
+
+def _construct_trusted_value(field, field_type: MemberType, value):
+    """ construct a field value without validation, nested factories are constructed as well """
+    if field_type == MemberType.Factory:
+        return _construct_trusted_factory(field.type_, value)
+    # as pydantic validation does, containers of factories end up as plain dict and list 
+    if field_type == MemberType.FactoryDict and value is not None:
+        return {key:_construct_trusted_factory(field.type_, item) for key, item in value.items()}
+    if field_type == MemberType.FactoryList and value is not None:
+        return [_construct_trusted_factory(field.type_, item) for item in value]
+    return value 
+
+
+_build_lock_guard = threading.Lock()
+_build_stats = {'contention': 0}
+
+class _Generation:
+    """ a counter incremented each time subsystems are rebuilt by reconfigure """
+    def __init__(self):
+        self.value = 0 
+        self.lock = threading.Lock()
+    def bump(self) -> None:
+        with self.lock:
+            self.value += 1 
+
+_tree_generation = _Generation()
+
+def build_contention_count() -> int:
+    """ Number of times a thread had to wait for a subsystem built by another thread """
+    return _build_stats['contention']
+
+def _get_build_lock(parent, name: str) -> threading.RLock:
+    """ return the lock protecting the build of subsystem `name` in parent """
+    try:
+        locks = parent.__dict__['__build_locks__']
+    except KeyError:
+        with _build_lock_guard:
+            locks = parent.__dict__.setdefault('__build_locks__', {})
+    try:
+        return locks[name]
+    except KeyError:
+        with _build_lock_guard:
+            return locks.setdefault(name, threading.RLock())
+
+def _release_build_lock(parent, name: str, lock: threading.RLock) -> None:
+    """ release a build lock, it is dropped once the subsystem is saved in parent """
+    if name in parent.__dict__:
+        with _build_lock_guard:
+            locks = parent.__dict__.get('__build_locks__', {})
+            if locks.get(name) is lock:
+                del locks[name]
+    lock.release()
+
+def _acquire_build_lock(lock: threading.RLock) -> None:
+    """ acquire a build lock, contention is counted """
+    if not lock.acquire(blocking=False):
+        with _build_lock_guard:
+            _build_stats['contention'] += 1
+        lock.acquire()
+
+
+_abuild_semaphore = ContextVar("_abuild_semaphore", default=None)
+
+@contextmanager
+def _abuild_limit(limit: Optional[int]):
+    """ limit the number of concurrent asynchronous builds started inside the context """
+    if limit is None:
+        yield 
+        return 
+    token = _abuild_semaphore.set(_lazy_import("asyncio").Semaphore(limit))
+    try:
+        yield
+    finally:
+        _abuild_semaphore.reset(token)
+
+
+class ConfigChange(NamedTuple):
+    """ a modified config field, as received by subscribers (see BaseSystem.subscribe) """
+    path: str # path of the system owning the config
+    field: str
+    old: Any
+    new: Any
+
+class _Subscription(NamedTuple):
+    callback: Callable[[List[ConfigChange]], None]
+    field: Optional[str]
+    subtree: bool
+
+_NOT_SET = object()
+_config_stamps = itertools.count(1)
+_subscriptions = {'count': 0} # number of active subscriptions, nothing is notified when 0
+_subscriptions_lock = threading.Lock()
+_notification_batch = ContextVar("_notification_batch", default=None)
+_tick_batches = weakref.WeakKeyDictionary() # event loop -> notifications of the current tick
+
+class _ConfigState:
+    """ generation, owner systems and cached fingerprint of one config instance
+
+    The generation is a stamp taken from a global counter each time a field of
+    the config is assigned: two states (before and after a change, or two different
+    configs) never have the same generation.
+    The fingerprint (see systemy.compare) is dropped at each assignment, as well as 
+    the fingerprints of the configs which were computed from it (`parents`).
+    """
+    __slots__ = ('config_id', 'generation', 'systems', 'fingerprint', 'parents', '__weakref__')
+    def __init__(self, config):
+        self.config_id = id(config)
+        self.generation = next(_config_stamps)
+        self.systems = [] # weak references of systems built with this config
+        self.fingerprint = None 
+        self.parents = [] # weak references of the states of configs containing this one 
+
+    def __reduce__(self):
+        # a state belongs to one config instance, copies and pickles start without state
+        return (type(None), ())
+
+def _get_config_state(config: "BaseFactory") -> _ConfigState:
+    state = config.__config_state__
+    # a shallow copy of the config shares the private attributes
+    if state is None or state.config_id != id(config):
+        state = _ConfigState(config)
+        object.__setattr__(config, '__config_state__', state)
+    return state
+
+def _attach_config(system: "BaseSystem", config) -> None:
+    """ record system as an owner of config, its subscribers are notified of config changes 
+
+    Systems are attached only while there are subscriptions, subscribe attaches 
+    the systems built before. 
+    """
+    if not _subscriptions['count'] or not isinstance(config, BaseFactory):
+        return
+    systems = _get_config_state(config).systems
+    for ref in systems:
+        if ref() is system:
+            return 
+    if len(systems) >= 8:
+        systems[:] = [ref for ref in systems if ref() is not None]
+    systems.append( weakref.ref(system) )
+
+def _release_subscription() -> None:
+    with _subscriptions_lock:
+        _subscriptions['count'] -= 1 
+
+def _invalidate_fingerprint(state: _ConfigState) -> None:
+    """ drop the cached fingerprint of a config and of the configs containing it """
+    stack = [state]
+    while stack:
+        state = stack.pop()
+        # a parent fingerprint is computed after its children ones: a state without 
+        # fingerprint has no parent with a fingerprint
+        if state.fingerprint is None:
+            continue
+        state.fingerprint = None 
+        parents, state.parents = state.parents, []
+        stack.extend( parent for parent in (ref() for ref in parents) if parent is not None )
+
+def _config_modified(config: "BaseFactory") -> _ConfigState:
+    """ bump the generation of a modified config and drop its fingerprint """
+    state = _get_config_state(config)
+    state.generation = next(_config_stamps)
+    _invalidate_fingerprint(state)
+    return state 
+
+def _config_changed(config: "BaseFactory", changes: Dict[str, Tuple[Any, Any]]) -> None:
+    """ bump the config generation and notify the subscribers of its systems """
+    state = _config_modified(config)
+    if not _subscriptions['count']:
+        return
+    for ref in list(state.systems):
+        system = ref()
+        if system is not None and system.__config__ is config:
+            _notify(system, changes)
+
+def _notify(system: "BaseSystem", changes: Dict[str, Tuple[Any, Any]]) -> None:
+    """ queue changes of the config of system for its subscribers and the subtree subscribers of its parents """
+    path = system.__path__ or ""
+    node = system
+    own = True
+    while node is not None:
+        for subscription in node.__dict__.get('__subscriptions__', ()):
+            if own or subscription.subtree:
+                for name, (old, new) in changes.items():
+                    if subscription.field is None or subscription.field == name:
+                        _queue_change(subscription.callback, ConfigChange(path, name, old, new))
+        parent_ref = node.__dict__.get('__parent_ref__', None)
+        node = parent_ref() if parent_ref is not None else None
+        own = False
+
+def _get_tick_batch() -> Optional[dict]:
+    """ notifications pending for the end of the current event loop tick, None outside a loop """
+    asyncio = sys.modules.get("asyncio", None)
+    if asyncio is None: # no event loop can be running 
+        return None
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    try:
+        return _tick_batches[loop]
+    except KeyError:
+        batch = _tick_batches[loop] = {}
+        loop.call_soon(_dispatch_tick, loop)
+        return batch
+
+def _dispatch_tick(loop) -> None:
+    _dispatch( _tick_batches.pop(loop, {}) )
+
+def _queue_change(callback, change: ConfigChange) -> None:
+    batch = _notification_batch.get()
+    if batch is None:
+        batch = _get_tick_batch()
+        if batch is None:
+            callback([change])
+            return
+    changes = batch.setdefault(callback, {})
+    key = (change.path, change.field)
+    previous = changes.get(key, None)
+    if previous is not None:
+        change = previous._replace(new=change.new)
+    changes[key] = change
+
+def _dispatch(batch: dict) -> None:
+    for callback, changes in batch.items():
+        callback( list(changes.values()) )
+
+@contextmanager
+def _restore_on_failure(config: "BaseFactory"):
+    """ restore the values of config if the block raises, its notifications are then dropped 
+    
+    Notifications queued in the block are dispatched (or passed to the enclosing 
+    batch) only if it succeeds. 
+    """
+    outer = _notification_batch.get()
+    old_dict = dict(config.__dict__)
+    old_fields_set = set(config.__fields_set__)
+    batch = {}
+    token = _notification_batch.set(batch)
+    try:
+        yield 
+    except BaseException:
+        config.__dict__.clear()
+        config.__dict__.update(old_dict)
+        config.__fields_set__.intersection_update(old_fields_set)
+        _config_modified(config)
+        raise 
+    finally:
+        _notification_batch.reset(token)
+    if outer is None:
+        _dispatch(batch)
+    else:
+        for callback, changes in batch.items():
+            for change in changes.values():
+                _queue_change(callback, change)
+
+@contextmanager
+def notification_batch():
+    """ Coalesce the change notifications of all configs until the end of the block
+
+    Each subscriber is then called once with the list of changes. Several changes
+    of the same field are merged into one (the first old value and the last new one).
+    reconfigure, batch_reconfigure and BaseFactory.update are batched the same way.
+    Outside a batch, changes are coalesced until the end of the event loop tick if
+    a loop is running in the thread, otherwise subscribers are called immediately.
+    """
+    if _notification_batch.get() is not None:
+        yield
+        return
+    batch = {}
+    token = _notification_batch.set(batch)
+    try:
+        yield
+    finally:
+        _notification_batch.reset(token)
+        _dispatch(batch)
+
 
 def join_path(*args) -> str:
     """ join key elements """
     return ".".join(a for a in args if a)
 
 
+_re_path_step = re.compile(r"""\.?([A-Za-z_][A-Za-z0-9_]*)|\[\s*(-?\d+)\s*\]|\[\s*'([^']*)'\s*\]|\[\s*"([^"]*)"\s*\]""")
+
+@lru_cache(maxsize=4096)
+def parse_system_path(path: str) -> Tuple[Tuple[str, Any], ...]:
+    """ parse a system path as built by factories into a tuple of steps 
+
+    "a.b['x'][3]" -> (("attr","a"), ("attr","b"), ("item","x"), ("item",3)) 
+    """
+    steps = []
+    pos = 0
+    path = path.strip()
+    while pos < len(path):
+        match = _re_path_step.match(path, pos)
+        if not match or (match.group(0).startswith(".") and not steps):
+            raise ValueError(f"invalid system path {path!r} at position {pos}")
+        attr, index, key1, key2 = match.groups()
+        if attr is not None:
+            if pos and not match.group(0).startswith("."):
+                raise ValueError(f"invalid system path {path!r} at position {pos}")
+            steps.append( ("attr", attr) )
+        elif index is not None:
+            steps.append( ("item", int(index)) )
+        else:
+            steps.append( ("item", key1 if key1 is not None else key2) )
+        pos = match.end()
+    return tuple(steps)
+
+
+def _resolve_path_step(obj, step: Tuple[str, Any]):
+    kind, key = step 
+    if kind == "attr":
+        return getattr(obj, key)
+    return obj[key]
+
+def _resolve_path(root, steps: Tuple[Tuple[str, Any], ...], path: str):
+    obj = root 
+    for step in steps:
+        try:
+            obj = _resolve_path_step(obj, step)
+        except (AttributeError, KeyError, IndexError, TypeError) as e:
+            raise ValueError(f"cannot resolve path {path!r}: {e!r}") from e 
+    return obj 
+
+
+_model_setattr = BaseModel.__setattr__
+
 class BaseFactory(BaseModel, ABC):
     __parent_attribute_name__ = PrivateAttr(None)
+    __config_state__ = PrivateAttr(None) # see _ConfigState 
+    # field name -> MemberInfo, computed once per class 
+    __member_types__: Dict[str, MemberInfo] = MappingProxyType({})
     
     class Config: #pydantic config  
         extra = Extra.forbid
@@ -67,8 +447,10 @@ class BaseFactory(BaseModel, ABC):
         except NameError:
             return 
         # Mutate normal list or dict of Factory into FactoryList or FactoryDict
+        member_types = {}
         for name, field in cls.__fields__.items():
-            field_type = _get_field_type(field)
+            member_types[name] = _get_member_info(field)
+            field_type = member_types[name].member_type 
         
             if field_type == MemberType.FactoryDict:
                 if field.default is not None and not isinstance(  field.default, FactoryDict ):
@@ -77,6 +459,7 @@ class BaseFactory(BaseModel, ABC):
             elif field_type == MemberType.FactoryList:
                 if field.default is not None and not isinstance(  field.default, FactoryList ):
                     field.default = FactoryList( list(field.default) )
+        cls.__member_types__ = MappingProxyType(member_types)
 
     @classmethod
     def get_system_class(cls):
@@ -87,6 +470,24 @@ class BaseFactory(BaseModel, ABC):
     def build(self, parent=None, path=None) -> "BaseSystem":
         """ Build the system object """
     
+    async def abuild(self, parent=None, name="") -> "BaseSystem":
+        """ Build the system object asynchronously 
+
+        The default implementation calls build and then awaits the __ainit__ 
+        hook of the built system. 
+        """
+        semaphore = _abuild_semaphore.get()
+        if semaphore is None:
+            return await self._abuild(parent, name)
+        async with semaphore:
+            return await self._abuild(parent, name)
+    
+    async def _abuild(self, parent, name):
+        system = self.build(parent, name)
+        if isinstance(system, BaseSystem):
+            await system.__ainit__()
+        return system 
+    
     def update(self, __d__=None, **kwargs):
         if __d__: 
             kwargs = dict(__d__, **kwargs)
@@ -94,10 +495,62 @@ class BaseFactory(BaseModel, ABC):
         validate_assignment_state = self.__config__.validate_assignment
         try:
             self.__config__.validate_assignment = True 
-            for key, value in kwargs.items():
-                setattr( self, key, value)
+            with notification_batch():
+                for key, value in kwargs.items():
+                    setattr( self, key, value)
         finally:
             self.__config__.validate_assignment = validate_assignment_state
+    
+    def __setattr__(self, name, value):
+        if self.__config_state__ is None and not _subscriptions['count']:
+            # nobody looks at the generation, the fingerprint or the changes 
+            return _model_setattr(self, name, value)
+        old_dict = self.__dict__
+        old = old_dict.get(name, _NOT_SET)
+        _model_setattr(self, name, value)
+        new_dict = self.__dict__
+        if new_dict is old_dict:
+            new = new_dict.get(name, _NOT_SET)
+            if new is _NOT_SET or _is_same_value(old, new): # private attribute or same value
+                return 
+            changes = {name:(None if old is _NOT_SET else old, new)}
+        else: 
+            # validate_assignment replaces the whole dictionary, root validators may change other fields
+            changes = {key:(old_dict.get(key, None), value) for key, value in new_dict.items() 
+                       if old_dict.get(key, _NOT_SET) is not value and not _is_same_value(old_dict.get(key, _NOT_SET), value)}
+            if not changes:
+                return 
+        _config_changed(self, changes)
+    
+    def get_generation(self) -> int:
+        """ A stamp changed each time a field of this config is assigned 
+
+        Compare it with a previous value to know in O(1) if anything has changed. 
+        Different config instances never share a generation.
+        """
+        return _get_config_state(self).generation
+    
+    @classmethod
+    def parse_trusted(cls, obj: Dict[str, Any]) -> "BaseFactory":
+        """ Create a factory from already validated data, skipping pydantic validation 
+
+        This is meant for data coming from a known-good source (e.g. a snapshot or a 
+        database filled from validated factories). Nested factories, dictionaries and 
+        lists of factories given as raw data are constructed the same way and 
+        defaults are applied. Nothing is checked, wrong data gives a broken factory. 
+        """
+        if isinstance(obj, cls):
+            return obj 
+        fields = cls.__fields__
+        member_types = cls.__member_types__
+        aliases = _get_alias_names(cls)
+        values = {}
+        for name, value in obj.items():
+            # data may be keyed by alias (as for validation) or by field name 
+            name = aliases.get(name, name)
+            field = fields.get(name)
+            values[name] = value if field is None else _construct_trusted_value(field, member_types[name].member_type, value)
+        return cls.construct(_fields_set=set(values), **values)
 
     def __get__(self, parent, cls=None):
         if parent is None:
@@ -106,14 +559,43 @@ class BaseFactory(BaseModel, ABC):
             return  self._build_and_save_in_parent(parent, self.__parent_attribute_name__)
         raise RuntimeError("attribute name is unknwon")
     
-    def _build_and_save_in_parent(self, parent, name):
+    def _build_and_save_in_parent(self, parent, name, **kwargs):
         try:
-            system = parent.__dict__[name]
+            return parent.__dict__[name]
         except KeyError:
-            system = self.build(parent, name)
-            parent.__dict__[name] = system
+            pass 
+        # slow path, the subsystem is built once even if several threads are asking for it  
+        lock = _get_build_lock(parent, name)
+        _acquire_build_lock(lock)
+        try:
+            try:
+                system = parent.__dict__[name]
+            except KeyError:
+                system = self.build(parent, name, **kwargs)
+                parent.__dict__[name] = system
+        finally:
+            _release_build_lock(parent, name, lock)
         return system
     
+    async def _abuild_and_save_in_parent(self, parent, name):
+        try:
+            return parent.__dict__[name]
+        except KeyError:
+            pass 
+        # concurrent coroutines asking for the same subsystem are waiting the same task 
+        pending = parent.__dict__.setdefault('__abuild_pending__', {})
+        try:
+            task = pending[name]
+        except KeyError:
+            task = pending[name] = _lazy_import("asyncio").ensure_future(self.abuild(parent, name))
+            try:
+                system = await task 
+            finally:
+                del pending[name]
+            return parent.__dict__.setdefault(name, system)
+        else:
+            return await task 
+
     @classmethod
     def _make_new_path(cls, parent: Optional["BaseSystem"], name: str):
         """ return a new path from a parent system and a name """
@@ -147,7 +629,11 @@ class BaseConfig(BaseFactory):
     def build(self, parent: "BaseSystem" = None, name="") -> "BaseSystem":
         """ Build a System class from this configuration """
         System = self.get_system_class()
-        return System(__config__ =self, __path__ = self._make_new_path(parent, name))
+        system = System(__config__ =self, __path__ = self._make_new_path(parent, name))
+        if parent is not None:
+            # used to notify the subtree subscribers of parents, see BaseSystem.subscribe
+            system.__dict__['__parent_ref__'] = weakref.ref(parent)
+        return system 
 
 
 
@@ -160,6 +646,13 @@ class FactoryDict(BaseFactory, UserDict):
         super().__init__(__root__=__root__)
         self.__dict__['__Factory__'] = __Factory__
 
+    @classmethod
+    def parse_trusted(cls, obj, __Factory__=BaseFactory) -> "FactoryDict":
+        """ Create a FactoryDict from trusted data without validation """
+        factories = cls.construct(__root__={key:_construct_trusted_factory(__Factory__, item) for key, item in obj.items()})
+        factories.__dict__['__Factory__'] = __Factory__
+        return factories 
+    
     @classmethod 
     def get_system_class(cls):
         return SystemDict
@@ -171,9 +664,43 @@ class FactoryDict(BaseFactory, UserDict):
     def __setitem__(self, key, value):
         if not isinstance(value, self.__Factory__):
             raise KeyError( f'item {key} is not a {self.__Factory__.__name__}')
-    def build(self, parent=None, name="") -> "SystemDict":
-        system_dict =  SystemDict( 
-                {key:factory.build(parent, name+"['"+str(key)+"']") for key,factory in self.items() })
+    def build(self, parent=None, name="", lazy: bool = False, maxsize: Optional[int] = None) -> "SystemDict":
+        """ Build a SystemDict from this dictionary of factories 
+
+        Args:
+            parent (BaseSystem, optional): parent system  
+            name (str, optional): attribute name of the dictionary inside its parent
+            lazy (bool, optional): if True a LazySystemDict is returned, items are 
+                built on first access 
+            maxsize (int, optional): for lazy dictionary only. Maximum number of 
+                built items kept in memory, the least recently used are dropped. 
+        """
+        if lazy:
+            system_dict = LazySystemDict(self, name, maxsize)
+        else:
+            system_dict =  SystemDict( 
+                {key:factory.build(parent, self._item_name(name, key)) for key,factory in self.items() })
+        return self._attach_to_parent(system_dict, parent)
+    
+    async def abuild(self, parent=None, name="", limit: Optional[int] = None) -> "SystemDict":
+        """ Build a SystemDict asynchronously, items are built concurrently 
+
+        Args:
+            parent (BaseSystem, optional): parent system  
+            name (str, optional): attribute name of the dictionary inside its parent
+            limit (int, optional): maximum number of items built at the same time 
+        """
+        keys = list(self.keys())
+        with _abuild_limit(limit):
+            systems = await _lazy_import("asyncio").gather( *(self[key].abuild(parent, self._item_name(name, key)) for key in keys) )
+        return self._attach_to_parent( SystemDict(dict(zip(keys, systems))), parent)
+
+    @staticmethod
+    def _item_name(name: str, key: str) -> str:
+        return name+"['"+str(key)+"']"
+    
+    @staticmethod
+    def _attach_to_parent(system_dict: "SystemDict", parent) -> "SystemDict":
         if parent:
             system_dict.__get_parent__ = weakref.ref(parent) 
         return system_dict 
@@ -188,6 +715,13 @@ class FactoryList(BaseFactory, UserList):
         super().__init__(__root__=__root__)
         self.__dict__['__Factory__'] = __Factory__
 
+    @classmethod
+    def parse_trusted(cls, obj, __Factory__=BaseFactory) -> "FactoryList":
+        """ Create a FactoryList from trusted data without validation """
+        factories = cls.construct(__root__=[_construct_trusted_factory(__Factory__, item) for item in obj])
+        factories.__dict__['__Factory__'] = __Factory__
+        return factories 
+    
     @classmethod 
     def get_system_class(cls):
         return SystemList 
@@ -199,10 +733,43 @@ class FactoryList(BaseFactory, UserList):
     def __setitem__(self, index, value):
         if not isinstance(value, self.__Factory__):
             raise KeyError( f'item {index} is not a Factory')
-    def build(self, parent=None, name="") -> "SystemList":
-        system_list = SystemList( 
-                [factory.build(parent, name+"["+str(i)+"]") for i, factory in enumerate(self) ]
-            )
+    def build(self, parent=None, name="", lazy: bool = False, maxsize: Optional[int] = None) -> "SystemList":
+        """ Build a SystemList from this list of factories 
+
+        Args:
+            parent (BaseSystem, optional): parent system  
+            name (str, optional): attribute name of the list inside its parent
+            lazy (bool, optional): if True a LazySystemList is returned, items are 
+                built on first access 
+            maxsize (int, optional): for lazy list only. Maximum number of 
+                built items kept in memory, the least recently used are dropped. 
+        """
+        if lazy:
+            system_list = LazySystemList(self, name, maxsize)
+        else:
+            system_list = SystemList( 
+                    [factory.build(parent, self._item_name(name, i)) for i, factory in enumerate(self) ]
+                )
+        return self._attach_to_parent(system_list, parent)
+    
+    async def abuild(self, parent=None, name="", limit: Optional[int] = None) -> "SystemList":
+        """ Build a SystemList asynchronously, items are built concurrently 
+
+        Args:
+            parent (BaseSystem, optional): parent system  
+            name (str, optional): attribute name of the list inside its parent
+            limit (int, optional): maximum number of items built at the same time 
+        """
+        with _abuild_limit(limit):
+            systems = await _lazy_import("asyncio").gather( *(factory.abuild(parent, self._item_name(name, i)) for i, factory in enumerate(self)) )
+        return self._attach_to_parent( SystemList(systems), parent)
+
+    @staticmethod
+    def _item_name(name: str, index: int) -> str:
+        return name+"["+str(index)+"]"
+    
+    @staticmethod
+    def _attach_to_parent(system_list: "SystemList", parent) -> "SystemList":
         if parent:
             system_list.__get_parent__ = weakref.ref(parent) 
         return system_list 
@@ -234,6 +801,30 @@ class ConfigAttribute:
         if self.attr is None:
             self.attr = name 
 
+def _config_value_setter(attr: str):
+    def set_config_value(parent, value):
+        if getattr(parent, "_allow_config_assignment", False):
+            setattr( parent.__config__, attr, value)
+        else:
+            raise ValueError(f"cannot set config attribute {attr!r} ")
+    return set_config_value 
+
+class ConfigValueAttribute(property, ConfigAttribute):
+    """ A ConfigAttribute for fields which cannot hold a factory 
+
+    The getter is an attrgetter('__config__.<attr>') so a read does not run any 
+    python code. The setter behaves as ConfigAttribute.__set__.
+    """
+    def __init__(self, attr):
+        property.__init__(self, attrgetter("__config__."+attr), _config_value_setter(attr))
+        self.attr = attr 
+
+def _is_plain_value_field(field) -> bool:
+    """ True if the value of a field can never be a factory (e.g. int, str, List[float]) """
+    type_ = field.type_
+    return type_ is not Any and isinstance(type_, type) and not issubclass(BaseFactory, type_)
+
+
 class SubsystemAttribute(BaseFactoryAttribute):
     def __init__(self, attr=None, alias=None):
         self.attr = attr
@@ -242,50 +833,68 @@ class SubsystemAttribute(BaseFactoryAttribute):
     def __get__(self, parent, cls=None):
         if parent is None: return self.get_attribute_config_class(cls) 
 
-        factory = getattr( parent.__config__, self.attr)
+        factory = self.get_factory(parent)
         if factory is None:
             return None
         return factory._build_and_save_in_parent(parent, self.alias or self.attr)
     
+    def get_factory(self, parent) -> Optional[BaseFactory]:
+        """ return the factory of the subsystem for a parent instance """
+        return getattr( parent.__config__, self.attr)
+    
     def __set_name__(self, parent, name):
         if self.attr is None:
             self.attr = name 
 
 
 class SubsystemDictAttribute(BaseFactoryAttribute):
-    def __init__(self, attr=None, alias=None):
+    def __init__(self, attr=None, alias=None, lazy: bool = False, maxsize: Optional[int] = None):
         self.attr = attr
         self.alias = alias 
+        self.lazy = lazy 
+        self.maxsize = maxsize 
 
     def __get__(self, parent, cls=None):
         if parent is None:       
             return self
-        factories = getattr( parent.__config__, self.attr)
-        
-        if isinstance(factories, FactoryDict):
-            return factories._build_and_save_in_parent( parent, self.alias or self.attr)
-        else:
-            return FactoryDict(factories)._build_and_save_in_parent( parent, self.alias or self.attr)
+        factories = self.get_factory(parent)
+        if self.lazy:
+            return factories._build_and_save_in_parent( parent, self.alias or self.attr, lazy=True, maxsize=self.maxsize)
+        return factories._build_and_save_in_parent( parent, self.alias or self.attr)
     
+    def get_factory(self, parent) -> FactoryDict:
+        """ return the FactoryDict of the subsystems for a parent instance """
+        factories = getattr( parent.__config__, self.attr)
+        if not isinstance(factories, FactoryDict):
+            factories = FactoryDict(factories)
+        return factories 
+
     def __set_name__(self, parent, name):
         if self.attr is None:
             self.attr = name 
 
 
 class SubsystemListAttribute(BaseFactoryAttribute):
-    def __init__(self, attr=None, alias=None):
+    def __init__(self, attr=None, alias=None, lazy: bool = False, maxsize: Optional[int] = None):
         self.attr = attr
         self.alias = alias 
+        self.lazy = lazy 
+        self.maxsize = maxsize 
 
     def __get__(self, parent, cls=None):
         if parent is None: return self
-        factories = getattr( parent.__config__, self.attr)
-        if isinstance( factories, FactoryList):
-            return factories._build_and_save_in_parent( parent, self.alias or self.attr)
-        else:
-            return FactoryList(factories)._build_and_save_in_parent( parent, self.alias or self.attr)
-            
+        factories = self.get_factory(parent)
+        if self.lazy:
+            return factories._build_and_save_in_parent( parent, self.alias or self.attr, lazy=True, maxsize=self.maxsize)
+        return factories._build_and_save_in_parent( parent, self.alias or self.attr)
     
+    def get_factory(self, parent) -> FactoryList:
+        """ return the FactoryList of the subsystems for a parent instance """
+        factories = getattr( parent.__config__, self.attr)
+        if not isinstance(factories, FactoryList):
+            factories = FactoryList(factories)
+        return factories 
+
     def __set_name__(self, parent, name):
         if self.attr is None:
             self.attr = name 
@@ -296,7 +905,9 @@ def _rebuild_config_class(ParentClass: "BaseSystem", Config: BaseConfig, kwargs:
     At least the Config is always inerited in order to modify it with 
     new kwargs and to mutate the weak reference to the parent class
     """
-    if not issubclass(Config, BaseFactory):
+    # mro check rather than issubclass: on a plain class the ABC check walks all 
+    # the BaseFactory subclasses
+    if BaseFactory not in Config.__mro__:
         for subcl in ParentClass.__mro__[1:]:
             try:
                 ParentConfigClass = getattr(subcl, "Config")
@@ -318,39 +929,156 @@ def _set_parent_class_reference(ParentClass: "BaseSystem", Config: BaseConfig) -
     """ Set a reference in Config pointing to the ParentClass """
     Config.__parent_system_class_ref__ = weakref.ref(ParentClass)
 
+def _get_lazy_field_options(field) -> dict:
+    """ lazy options of a list or dict of factories, e.g. Field({}, lazy=True, maxsize=100) """
+    extra = field.field_info.extra
+    return {'lazy': extra.get('lazy', False), 'maxsize': extra.get('maxsize', None)}
+
 def _create_factory_attributes(Config: BaseConfig) -> dict:
     """ Populate ParentClass with any Sub-System Configuration found in Config """
     attributes = {}
-    for name, field in Config.__fields__.items():
-        field_type = _get_field_type(field)
+    for name, (field_type, _) in Config.__member_types__.items():
+        field = Config.__fields__[name]
 
         if field_type == MemberType.FactoryDict:
-            attributes[name] =  SubsystemDictAttribute(name)
+            attributes[name] =  SubsystemDictAttribute(name, **_get_lazy_field_options(field))
             # mutate a normal dict to a Factorydict (this is safe because a copy)
             # if field.default is not None and not isinstance(  field.default, FactoryDict ):
             #     field.default = FactoryDict( field.default )
 
         elif field_type == MemberType.FactoryList:
-            attributes[name] = SubsystemListAttribute(name)
+            attributes[name] = SubsystemListAttribute(name, **_get_lazy_field_options(field))
             # if field.default is not None and not isinstance(  field.default, FactoryList ):
             #     field.default = FactoryList( list(field.default) )
 
         elif field_type == MemberType.Factory:
             attributes[name] = SubsystemAttribute(name)
+        elif _is_plain_value_field(field):
+            attributes[name] = ConfigValueAttribute(name)
         else:
             attributes[name] = ConfigAttribute(name)
 
     return attributes 
 
 
+def _has_class_attribute(cls, name: str) -> bool:
+    """ True if the class has this attribute, no descriptor is called """
+    return any(name in subcl.__dict__ for subcl in cls.__mro__) or hasattr(type(cls), name)
+
 def _set_factory_attributes(ParentClass: "BaseSystem", attributes: Dict) -> None:
     """ Set a dictionary of attributes into the class """
     for name, obj in attributes.items():
-        try:
-            getattr( ParentClass, name)
-        except AttributeError:
+        if not _has_class_attribute(ParentClass, name):
+            setattr(ParentClass, name, obj)
+        elif not isinstance(obj, ConfigValueAttribute) and _is_inherited_config_value(ParentClass, name):
+            # an inherited plain field is retyped and may now hold a factory 
             setattr(ParentClass, name, obj)
 
+def _is_inherited_config_value(ParentClass: "BaseSystem", name: str) -> bool:
+    if name in ParentClass.__dict__:
+        return False 
+    for subcl in ParentClass.__mro__[1:]:
+        if name in subcl.__dict__:
+            return isinstance(subcl.__dict__[name], ConfigValueAttribute)
+    return False 
+
+
+def _get_inherited_config_owner(ParentClass: "BaseSystem") -> Optional[type]:
+    """ the first class of the mro defining Config, if it is a system class """
+    for subcl in ParentClass.__mro__[1:]:
+        Config = subcl.__dict__.get("Config", None)
+        if Config is None:
+            continue 
+        if isinstance(Config, _DeferredConfig) or (isinstance(Config, type) and issubclass(Config, BaseConfig)):
+            return subcl 
+        return None 
+    return None 
+
+
+class _DeferredConfig:
+    """ Config of a System class which does not modify the Config of its parent class 
+
+    Such a class has the same fields and therefore the same attributes as its parent. 
+    Only the Config class pointing back to the System class is missing, it is 
+    created on first access (e.g. at first instantiation) and replaces this descriptor. 
+    """
+    def __init__(self, owner: "BaseSystem"):
+        self.owner = owner 
+        self.lock = threading.Lock()
+    
+    def __get__(self, obj, cls=None):
+        with self.lock:
+            Config = self.owner.__dict__["Config"]
+            if Config is self:
+                ParentConfig = getattr(_get_inherited_config_owner(self.owner), "Config")
+                Config = _rebuild_config_class(self.owner, ParentConfig, {})
+                _set_parent_class_reference(self.owner, Config)
+                setattr(self.owner, "Config", Config)
+        return Config 
+
+
+class SubsystemSlot(NamedTuple):
+    """ A class attribute of a System holding a subsystem factory """
+    name: str # attribute name in the System class 
+    member_type: MemberType 
+    descriptor: Any # the BaseFactory or BaseFactoryAttribute found in the class 
+
+    @property
+    def key(self) -> str:
+        """ key of the built subsystem inside the parent __dict__ """
+        if isinstance(self.descriptor, BaseFactory):
+            return self.descriptor.__parent_attribute_name__ or self.name
+        return self.descriptor.alias or self.descriptor.attr 
+
+    @property
+    def lazy(self) -> bool:
+        return getattr(self.descriptor, "lazy", False)
+
+    def is_built(self, parent: "BaseSystem") -> bool:
+        return self.key in parent.__dict__
+    
+    def get_factory(self, parent: "BaseSystem") -> Optional[BaseFactory]:
+        """ return the factory of this slot for a parent instance """
+        if isinstance(self.descriptor, BaseFactory):
+            return self.descriptor 
+        return self.descriptor.get_factory(parent)
+
+
+def _get_slot_member_type(obj) -> Optional[MemberType]:
+    """ return the MemberType of a class attribute or None if this is not a subsystem slot """
+    if isinstance(obj, FactoryDict) or isinstance(obj, SubsystemDictAttribute):
+        return MemberType.FactoryDict
+    if isinstance(obj, FactoryList) or isinstance(obj, SubsystemListAttribute):
+        return MemberType.FactoryList
+    if isinstance(obj, (BaseFactory, SubsystemAttribute)):
+        return MemberType.Factory
+    return None 
+
+
+def _collect_subsystem_slots(ParentClass: "BaseSystem") -> Dict[str, SubsystemSlot]:
+    """ Build the table of subsystem slots of a System class 
+
+    The class __dict__ are walked through the mro, no descriptor is called. 
+    Slots are sorted by name (as dir() would do).
+    """
+    bases = ParentClass.__bases__
+    if len(bases) == 1 and "__subsystem_slots__" in bases[0].__dict__:
+        # single inheritance, start from the slots of the base class 
+        slots = dict(bases[0].__subsystem_slots__)
+        classes = (ParentClass,)
+    else:
+        slots = {}
+        classes = reversed(ParentClass.__mro__)
+    for subcl in classes:
+        for name, obj in subcl.__dict__.items():
+            if name.startswith("__") or name == "Config": continue 
+            member_type = _get_slot_member_type(obj)
+            if member_type is None:
+                slots.pop(name, None)
+            else:
+                slots[name] = SubsystemSlot(name, member_type, obj)
+    return {name:slots[name] for name in sorted(slots)}
+
 
 def _get_extra_config_attribute(system, attr):
     """ use has __getattr__ when Config class allows extra element 
@@ -369,9 +1097,17 @@ def _get_extra_config_attribute(system, attr):
 
 
 def systemclass(cls, **kwargs):
+    clear_find_factories_cache(cls)
+    if "Config" not in cls.__dict__ and not kwargs and _get_inherited_config_owner(cls) is not None:
+        # Config is not modified, its creation is deferred to first use 
+        cls.Config = _DeferredConfig(cls)
+        cls.__subsystem_slots__ = _collect_subsystem_slots(cls)
+        return cls 
+    
     cls.Config = _rebuild_config_class(cls, cls.Config, kwargs)
     _set_parent_class_reference( cls, cls.Config)
     _set_factory_attributes( cls, _create_factory_attributes(cls.Config) ) 
+    cls.__subsystem_slots__ = _collect_subsystem_slots(cls)
 
     if cls.Config.__config__.extra == Extra.allow:
         if not hasattr(cls, "__getattr__"):
@@ -383,6 +1119,7 @@ class BaseSystem(ABC):
     __config__ = None  
     _allow_config_assignment = False
     __factory_classes__ = set() 
+    __subsystem_slots__: Dict[str, SubsystemSlot] = {} # computed by systemclass 
 
     class Config(BaseConfig):
         ...
@@ -390,16 +1127,18 @@ class BaseSystem(ABC):
     def __init_subclass__(cls, **kwargs) -> None:
         systemclass(cls, **kwargs)
 
-    def __init__(self,* , __config__=None, __path__= None, **kwargs):
+    def __init__(self,* , __config__=None, __path__= None, __trusted__=False, **kwargs):
+        # __trusted__=True skips the validation of config data (see BaseFactory.parse_trusted)
         if isinstance(__config__, dict):
-            __config__ = self.Config(**__config__)
+            __config__ = self.Config.parse_trusted(__config__) if __trusted__ else self.Config(**__config__)
 
         if __config__ is None:
-            __config__ = self.Config(**kwargs)
+            __config__ = self.Config.parse_trusted(kwargs) if __trusted__ else self.Config(**kwargs)
         elif kwargs:
             raise ValueError("Cannot mix __config__ argument and **kwargs")
         self.__config__ = __config__ 
         self.__path__ = __path__
+        _attach_config(self, __config__)
 
     # def __getattr__(self, attr):
     #     try:
@@ -420,47 +1159,255 @@ class BaseSystem(ABC):
     #             if isinstance(obj, BaseSystem) and depth:
     #                 obj._build_all(depth-1)
 
-    def reconfigure( self, __d__: Optional[Dict[str, Any]] = None, **kwargs):
-        """ Configure system """
+    def reconfigure( self, __d__: Optional[Dict[str, Any]] = None, **kwargs) -> List[str]:
+        """ Configure system 
+
+        Subsystems already built from a modified factory are updated: 
+            - a subsystem whose factory only differs by its own subsystems is kept, 
+              the comparison goes on recursively 
+            - a subsystem whose factory has new values (or a new class) is rebuilt 
+            - items of dictionaries and lists of subsystems are compared one by one
+        Other subsystems are left alone. If anything fails (an invalid value 
+        or a subsystem build) the config and the built subsystems are restored. 
+        
+        Returns:
+            rebuilt (list[str]): paths of the rebuilt (or removed) subsystems 
+        """
         if __d__: 
             kwargs = dict(__d__, **kwargs)
-        for key, value in kwargs.items():
-             setattr(self.__config__, key, value)
-
-    def find(self, SystemType: Type["BaseSystem"], depth: int=0)-> Iterable:
-        # self._build_all()
-        for attr in dir(self):
-            if attr.startswith("__"): continue
-            try: # durty patch to avoid side effect 
-                obj = getattr(self, attr)
-            except (ValueError, AttributeError, KeyError) as e:
-                
-                if has_factory( self.__class__, attr):
-                    raise e
-                else:
-                    continue 
+        config = self.__config__
+        old_values = {key:config.__dict__.get(key, None) for key in kwargs}
+        with _restore_on_failure(config):
+            for key, value in kwargs.items():
+                 setattr(config, key, value)
+            return self._reconcile(old_values)
+    
+    def subscribe(self, callback: Callable[[List[ConfigChange]], None], field: Optional[str] = None, subtree: bool = False) -> Callable[[], None]:
+        """ Call callback with a list of ConfigChange when the config of this system changes 
+
+        Args:
+            callback: called with the list of changes, see notification_batch for 
+                when it is called 
+            field (str, optional): only changes of this field name 
+            subtree (bool, optional): also changes of the subsystems built from this 
+                system (the ones already built or built later)
+        
+        Returns:
+            unsubscribe: a function removing the subscription. The subscription is 
+                also released when this system is garbage collected. 
+        """
+        subscription = _Subscription(callback, field, subtree)
+        with _subscriptions_lock:
+            # the list is replaced, not modified, notifications may iterate it 
+            self.__dict__['__subscriptions__'] = self.__dict__.get('__subscriptions__', []) + [subscription]
+            _subscriptions['count'] += 1 
+        release = weakref.finalize(self, _release_subscription)
+        
+        # systems built while nobody was subscribed are not attached to their config 
+        _attach_config(self, self.__config__)
+        if subtree:
+            for system in self.find(BaseSystem, depth=-1, built_only=True):
+                _attach_config(system, system.__config__)
+        
+        system_ref = weakref.ref(self)
+        def unsubscribe():
+            system = system_ref()
+            if system is not None:
+                with _subscriptions_lock:
+                    subscriptions = list(system.__dict__.get('__subscriptions__', []))
+                    if subscription in subscriptions:
+                        subscriptions.remove(subscription)
+                        system.__dict__['__subscriptions__'] = subscriptions
+            release() # once only 
+        return unsubscribe 
+    
+    def batch_reconfigure(self) -> "ReconfigureTransaction":
+        """ Start a transaction of changes addressed by path in the tree of this system 
+
+        Usage:
+            with system.batch_reconfigure() as tx:
+                tx.set("speed", 2.0)
+                tx.set("motors['x'].speed", 3.0)
+                tx.update("stage", {'x':1.0, 'y':2.0})
+            tx.rebuilt # paths of the rebuilt subsystems 
+
+        Changes are applied at the end of the with block, see ReconfigureTransaction.apply. 
+        Nothing is applied if the block raises. 
+        """
+        return ReconfigureTransaction(self)
+
+    def _reconcile(self, old_values: Dict[str, Any]) -> List[str]:
+        """ update built subsystems after a change of config fields, return the rebuilt paths """
+        config = self.__config__
+        changes = {}
+        for key, old in old_values.items():
+            new = config.__dict__.get(key, None)
+            if new is not old:
+                changes[key] = (old, new)
+        reconfigurator = _Reconfigurator()
+        try:
+            reconfigurator.reconcile_fields(self, changes)
+        except BaseException:
+            reconfigurator.rollback()
+            raise 
+        if reconfigurator.rebuilt:
+            _tree_generation.bump()
+        return reconfigurator.rebuilt 
+
+    def find(self, SystemType: Type["BaseSystem"], depth: int=0, built_only: bool = False)-> Iterable:
+        """ iterate over subsystems matching SystemType 
+
+        Subsystems are the factory slots of the class (see __subsystem_slots__) 
+        and the systems set on the instance (e.g. self.motor = Motor() in __init__). 
+        Subsystems returned by a property or a method are not visited. 
+
+        Args:
+            SystemType (Type, Tuple[Type]): class(es) of the matched subsystems 
+            depth (int, optional): recursion depth, -1 for infinite 
+            built_only (bool, optional): if True subsystems which are not yet built 
+                are skiped (and are not built) 
+        """
+        for _, obj in self._iter_subsystems(built_only):
             if isinstance(obj, SystemType):
                 yield obj
 
             if depth and _is_subsystem_iterable(obj):
-                for other in obj.find(SystemType, depth-1):
+                for other in obj.find(SystemType, depth-1, built_only):
                     yield other 
     
   
-    def children(self, SystemType: Optional[Type["BaseSystem"]] = None):
+    def children(self, SystemType: Optional[Type["BaseSystem"]] = None, built_only: bool = False):
+        """ iterate over attribute names of direct subsystems matching SystemType 
+
+        As for find, subsystems returned by a property are not visited. 
+
+        Args:
+            SystemType (Type, Tuple[Type], optional): default is BaseSystem 
+            built_only (bool, optional): if True subsystems which are not yet built 
+                are skiped (and are not built) 
+        """
         if SystemType is None:
             SystemType = BaseSystem
-        for attr in dir(self):
-            if attr.startswith("__"): continue 
-            # obj = getattr(self, attr)
-            try:
-                obj = getattr(self, attr)
-            except (ValueError, AttributeError, KeyError):
-                continue 
-
+        for name, obj in self._iter_subsystems(built_only):
             if isinstance(obj, SystemType):
-                yield attr
-
+                yield name 
+    
+    def _iter_subsystems(self, built_only: bool = False) -> Iterator[Tuple[str, Any]]:
+        """ iterate over (name, subsystem) of the class slots then of the instance """
+        slot_keys = set()
+        for slot in self.__subsystem_slots__.values():
+            slot_keys.add(slot.key)
+            if built_only and not slot.is_built(self):
+                continue
+            yield slot.name, getattr(self, slot.name)
+        for name, obj in list(self.__dict__.items()):
+            if name.startswith("__") or name in slot_keys:
+                continue 
+            if _is_subsystem_iterable(obj):
+                yield name, obj 
+
+    def get_path(self, path: str):
+        """ return the subsystem located at path relative to this system 
+
+        path has the same format than the __path__ of subsystems, e.g. "a.b['x'][3]". 
+        Resolved paths are cached in this system with weak references only, a cached 
+        subsystem is returned only if it is still attached at path. 
+        """
+        cache = self._get_path_cache()
+        steps = parse_system_path(path)
+        obj = cache.get(path, _NOT_SET)
+        if obj is not _NOT_SET and _is_attached_at(self, steps, obj):
+            return obj 
+        obj = _resolve_path(self, steps, path)
+        _cache_path(cache, path, obj)
+        return obj 
+    
+    def get_paths(self, paths: Iterable[str]) -> List[Any]:
+        """ Resolve several paths at once, common parents are resolved once """
+        cache = self._get_path_cache()
+        resolved = {(): self}
+        result = []
+        for path in paths:
+            steps = parse_system_path(path)
+            obj = cache.get(path, _NOT_SET)
+            if obj is not _NOT_SET and _is_attached_at(self, steps, obj):
+                result.append(obj)
+                continue 
+            for i in range(len(steps), -1, -1):
+                if steps[:i] in resolved:
+                    break 
+            obj = resolved[steps[:i]]
+            for j in range(i, len(steps)):
+                try:
+                    obj = _resolve_path_step(obj, steps[j])
+                except (AttributeError, KeyError, IndexError, TypeError) as e:
+                    raise ValueError(f"cannot resolve path {path!r}: {e!r}") from e 
+                resolved[steps[:j+1]] = obj 
+            _cache_path(cache, path, obj)
+            result.append(obj)
+        return result 
+
+    def _get_path_cache(self) -> weakref.WeakValueDictionary:
+        # the cache is dropped when any subsystem has been rebuilt by reconfigure 
+        generation = _tree_generation.value 
+        try:
+            cache_generation, cache = self.__dict__['__path_cache__']
+        except KeyError:
+            pass 
+        else:
+            if cache_generation == generation:
+                return cache 
+        cache = weakref.WeakValueDictionary()
+        self.__dict__['__path_cache__'] = (generation, cache)
+        return cache 
+
+    async def __ainit__(self) -> None:
+        """ Optional asynchronous initialisation 
+
+        Awaited after __init__ when the system is built asynchronously (abuild, 
+        abuild_all, aget). It should not await the build of other subsystems. 
+        """
+
+    async def aget(self, attr: str):
+        """ return a subsystem, it is built asynchronously if not already built """
+        slot = self.__subsystem_slots__[attr]
+        if slot.is_built(self) or slot.lazy:
+            return getattr(self, attr)
+        factory = slot.get_factory(self)
+        if factory is None:
+            return None 
+        return await factory._abuild_and_save_in_parent(self, slot.key)
+
+    async def abuild_all(self, depth: int = 0, limit: Optional[int] = None) -> None:
+        """ Build all subsystems asynchronously, sibling subsystems are built concurrently 
+
+        This is the asynchronous counterpart of build_all, subsystems __ainit__ 
+        are awaited. 
+
+        Args:
+            depth (int, optional): recursion depth as in find, -1 for infinite 
+            limit (int, optional): maximum number of subsystems built at the same time
+        """
+        with _abuild_limit(limit):
+            await _abuild_tree(self, depth)
+
+    def build_all(self, depth: int = 0, executor: Optional["Executor"] = None, max_workers: Optional[int] = None) -> None:
+        """ Build all subsystems, sibling subsystems are built concurrently 
+
+        Each built subsystem is saved inside its parent exactly as it would be on first 
+        access. Items of SystemDict/SystemList are built concurrently as well. Lazy 
+        SystemDict/SystemList are created but their items are not built. 
+
+        Args:
+            depth (int, optional): recursion depth as in find, -1 for infinite 
+            executor (Executor, optional): executor used to build subsystems. Default 
+                is a new ThreadPoolExecutor(max_workers) shutdown at the end 
+            max_workers (int, optional): max_workers of the default executor 
+        """
+        if executor is None:
+            with _lazy_import("concurrent.futures").ThreadPoolExecutor(max_workers) as executor:
+                return self.build_all(depth, executor)
+        _TreeBuilder(executor).run(self, depth)
 
     
 class SystemDict(UserDict):
@@ -468,15 +1415,15 @@ class SystemDict(UserDict):
     def __setitem__(self, key, system):
         super().__setitem__(key, self.__parse_item__(system, key))    
             
-    def find(self, SystemType: Type[BaseSystem], depth: int =0):
+    def find(self, SystemType: Type[BaseSystem], depth: int =0, built_only: bool = False):
         for system in self.values():
             if isinstance(system, SystemType):
                 yield system 
             if depth and _is_subsystem_iterable(system):
-                for other in system.find( SystemType, depth -1):
+                for other in system.find( SystemType, depth -1, built_only):
                     yield other 
     
-    def children(self, SystemType: Optional[Type["BaseSystem"]] = None):
+    def children(self, SystemType: Optional[Type["BaseSystem"]] = None, built_only: bool = False):
         return 
         yield 
      
@@ -514,15 +1461,15 @@ class SystemList(UserList):
         system = self.__parse_item__(system , index)
         super().__setitem__(index, system)    
             
-    def find(self, SystemType: Type[BaseSystem], depth: int =0):
+    def find(self, SystemType: Type[BaseSystem], depth: int =0, built_only: bool = False):
         for system in self:
             if isinstance(system, SystemType):
                 yield system 
             if depth and _is_subsystem_iterable(system):
-                for other in system.find( SystemType, depth -1):
+                for other in system.find( SystemType, depth -1, built_only):
                     yield other 
     
-    def children(self, SystemType: Optional[Type["BaseSystem"]] = None):
+    def children(self, SystemType: Optional[Type["BaseSystem"]] = None, built_only: bool = False):
         return 
         yield 
      
@@ -546,24 +1493,715 @@ class SystemList(UserList):
     def __factory_item_builder__(self, factory, index):
         parent = self.__get_parent__()
         return factory.build(parent, "["+str(index)+"]") 
+
+class _LazyItem:
+    """ Item of a lazy container: a factory and the system it has built (if any) 
+
+    factory is None when a system has been set directly in the container  
+    """
+    __slots__ = ("factory", "system", "lock")
+    def __init__(self, factory=None, system=None):
+        self.factory = factory 
+        self.system = system 
+        self.lock = None # build lock, created on first build 
+
+
+class _LazyContainer:
+    """ Common methods of LazySystemDict and LazySystemList """
+    def _init_lazy(self, name, maxsize):
+        self.__name__ = name
+        self.__maxsize__ = maxsize 
+        self.__lru__ = OrderedDict()
+        self.__lock__ = threading.RLock()
+
+    def __get_parent__(self):
+        return None 
+    
+    def _get_system(self, item, key):
+        system = item.system
+        if system is not None:
+            if self.__maxsize__ is not None:
+                with self.__lock__:
+                    if id(item) in self.__lru__:
+                        self.__lru__.move_to_end(id(item))
+            return system 
+        # items are built under their own lock, the container lock only protects the lru 
+        lock = self._get_item_lock(item)
+        _acquire_build_lock(lock)
+        try:
+            system = item.system
+            if system is None:
+                system = self.__factory_item_builder__(item.factory, key)
+                with self.__lock__:
+                    item.system = system 
+                    if self.__maxsize__ is not None:
+                        self.__lru__[id(item)] = item 
+                        while len(self.__lru__) > self.__maxsize__:
+                            _, dropped = self.__lru__.popitem(last=False)
+                            dropped.system = None 
+        finally:
+            lock.release()
+        return system 
+    
+    def _get_item_lock(self, item) -> threading.RLock:
+        lock = item.lock 
+        if lock is None:
+            with self.__lock__:
+                lock = item.lock 
+                if lock is None:
+                    lock = item.lock = threading.RLock()
+        return lock 
+    
+    def _discard(self, item):
+        with self.__lock__:
+            self.__lru__.pop(id(item), None)
+    
+    def _parse_lazy_item(self, item):
+        if isinstance(item, BaseFactory):
+            return _LazyItem(factory=item)
+        if not isinstance(item, (BaseSystem, SystemDict, SystemList)):
+            raise KeyError(f"new item is not an iterable system")
+        return _LazyItem(system=item)
+
+    def _iter_items(self):
+        raise NotImplementedError()
+
+    def is_built(self, key) -> bool:
+        """ True if the item at key (or index) is currently built """
+        return self.data[key].system is not None 
+    
+    def find(self, SystemType: Type["BaseSystem"], depth: int =0, built_only: bool = False):
+        for key, item in self._iter_items():
+            if built_only and item.system is None:
+                continue
+            system = self._get_system(item, key)
+            if isinstance(system, SystemType):
+                yield system 
+            if depth and _is_subsystem_iterable(system):
+                for other in system.find( SystemType, depth -1, built_only):
+                    yield other 
+     
+    def __repr__(self):
+        n_built = sum(1 for _, item in self._iter_items() if item.system is not None)
+        return f"<{self.__class__.__name__} {self.__name__!r} {n_built}/{len(self.data)} built>"
+
+
+class LazySystemDict(_LazyContainer, SystemDict):
+    """ A SystemDict building its items on first access 
+
+    The factories are kept and each item is built when accessed the first time 
+    (getitem or iteration). If maxsize is given, only the maxsize most recently 
+    used built items are kept, the others will be rebuilt on next access. 
+    Systems set directly in the dictionary are never dropped. 
+    """
+    def __init__(self, factories: Optional[Dict[str, BaseFactory]] = None, name: str = "", maxsize: Optional[int] = None):
+        super().__init__()
+        self._init_lazy(name, maxsize)
+        if factories:
+            for key, factory in factories.items():
+                self.data[key] = _LazyItem(factory=factory)
+
+    def __getitem__(self, key):
+        return self._get_system(self.data[key], key)
+    
+    def __setitem__(self, key, item):
+        try:
+            self._discard(self.data[key])
+        except KeyError:
+            pass
+        super().__setitem__(key, item)
+    
+    def __delitem__(self, key):
+        self._discard(self.data.pop(key))
+    
+    def clear(self):
+        self.data.clear()
+        self.__lru__.clear()
+
+    def _iter_items(self):
+        return list(self.data.items())
+
+    def __parse_item__(self, item, key):
+        return self._parse_lazy_item(item)
+    
+    def __factory_item_builder__(self, factory, key):
+        return factory.build(self.__get_parent__(), self.__name__+"['"+str(key)+"']")
+
+
+class LazySystemList(_LazyContainer, SystemList):
+    """ A SystemList building its items on first access 
+
+    The factories are kept and each item is built when accessed the first time 
+    (getitem or iteration). If maxsize is given, only the maxsize most recently 
+    used built items are kept, the others will be rebuilt on next access.
+    Systems set directly in the list are never dropped. 
+    """
+    def __init__(self, factories: Optional[List[BaseFactory]] = None, name: str = "", maxsize: Optional[int] = None):
+        super().__init__()
+        self._init_lazy(name, maxsize)
+        if factories:
+            self.data.extend( _LazyItem(factory=factory) for factory in factories)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SystemList( self[i] for i in range(*index.indices(len(self.data))) )
+        if index < 0:
+            index += len(self.data)
+        if not 0 <= index < len(self.data):
+            raise IndexError("list index out of range")
+        return self._get_system(self.data[index], index)
+    
+    def __setitem__(self, index, item):
+        self._discard(self.data[index])
+        super().__setitem__(index, item)
+    
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            for item in self.data[index]:
+                self._discard(item)
+        else:
+            self._discard(self.data[index])
+        del self.data[index]
+    
+    def __iter__(self):
+        for index, item in self._iter_items():
+            yield self._get_system(item, index)
+    
+    def __contains__(self, system):
+        return any(item.system is system for item in self.data)
+    
+    def index(self, system, *args):
+        for index, item in enumerate(self.data):
+            if item.system is system:
+                return index 
+        raise ValueError(f"{system!r} is not in list")
+    
+    def remove(self, system):
+        del self[self.index(system)]
+
+    def pop(self, index=-1):
+        system = self[index]
+        del self[index]
+        return system 
+
+    def clear(self):
+        self.data.clear()
+        self.__lru__.clear()
+    
+    def _iter_items(self):
+        return list(enumerate(self.data))
+
+    def __parse_item__(self, item, index=None):
+        return self._parse_lazy_item(item)
+    
+    def __factory_item_builder__(self, factory, index):
+        return factory.build(self.__get_parent__(), self.__name__+"["+str(index)+"]")
+
+        
+class _TreeBuilder:
+    """ Build a tree of systems with an executor, see BaseSystem.build_all 
+
+    Only the builds are submitted to the executor, the walk through the tree 
+    is done in the calling thread. Therefore no task is waiting for other tasks 
+    and a bounded pool cannot deadlock.
+    """
+    def __init__(self, executor: "Executor"):
+        self.executor = executor 
+        self.pending = {} # future -> callback(result)
+    
+    def run(self, system: "BaseSystem", depth: int):
+        futures = _lazy_import("concurrent.futures")
+        self.expand(system, depth)
+        try:
+            while self.pending:
+                done, _ = futures.wait(self.pending, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    callback = self.pending.pop(future)
+                    callback(future.result())
+        finally:
+            for future in self.pending:
+                future.cancel()
+    
+    def submit(self, func, args, callback):
+        self.pending[self.executor.submit(func, *args)] = callback
+    
+    def expand(self, obj, depth: int):
+        if isinstance(obj, BaseSystem):
+            for slot in obj.__subsystem_slots__.values():
+                self.build_slot(obj, slot, depth)
+        elif isinstance(obj, _LazyContainer):
+            return 
+        elif depth and isinstance(obj, (SystemDict, SystemList)):
+            for system in (obj.values() if isinstance(obj, SystemDict) else obj):
+                self.expand(system, depth-1)
+    
+    def build_slot(self, parent: "BaseSystem", slot: SubsystemSlot, depth: int):
+        def callback(obj):
+            if depth and obj is not None:
+                self.expand(obj, depth-1)
+        
+        if slot.is_built(parent):
+            return callback(parent.__dict__[slot.key])
+        if slot.lazy:
+            return callback(getattr(parent, slot.name))
+        
+        factory = slot.get_factory(parent)
+        if isinstance(factory, (FactoryDict, FactoryList)):
+            self.build_container(parent, slot, factory, callback)
+        elif factory is not None:
+            self.submit(getattr, (parent, slot.name), callback)
+    
+    def build_container(self, parent, slot, factories, callback):
+        """ build the items concurrently, the container is published when all are built 
+
+        No lock is held while the items are built. If another thread has published 
+        the container in the meantime, its container is kept. 
+        """
+        key = slot.key 
+        if isinstance(factories, FactoryDict):
+            keys = list(factories.keys())
+        else:
+            keys = list(range(len(factories)))
+        systems = {}
+        
+        def save_container():
+            if isinstance(factories, FactoryDict):
+                container = SystemDict( {k:systems[k] for k in keys} )
+            else:
+                container = SystemList( [systems[i] for i in keys] )
+            container = factories._attach_to_parent(container, parent)
+            lock = _get_build_lock(parent, key)
+            _acquire_build_lock(lock)
+            try:
+                container = parent.__dict__.setdefault(key, container)
+            finally:
+                _release_build_lock(parent, key, lock)
+            callback( container )
+        
+        def item_callback(k):
+            def set_item(system):
+                systems[k] = system 
+                if len(systems) == len(keys):
+                    save_container()
+            return set_item
+        
+        if not keys:
+            return save_container()
+        for k in keys:
+            self.submit( factories[k].build, (parent, factories._item_name(key, k)), item_callback(k))
+
+
+def _peek_path_step(obj, step: Tuple[str, Any]):
+    """ the subsystem already at step, _NOT_SET if not built. Nothing is built """
+    kind, key = step 
+    if kind == "attr":
+        return getattr(obj, "__dict__", {}).get(key, _NOT_SET)
+    if not isinstance(obj, (SystemDict, SystemList)):
+        return _NOT_SET 
+    try:
+        item = obj.data[key]
+    except (KeyError, IndexError, TypeError):
+        return _NOT_SET 
+    if isinstance(item, _LazyItem):
+        return _NOT_SET if item.system is None else item.system 
+    return item 
+
+def _is_attached_at(root, steps: Tuple[Tuple[str, Any], ...], obj) -> bool:
+    """ True if obj is still the subsystem found at steps from root (e.g. not replaced) """
+    node = root 
+    for step in steps:
+        node = _peek_path_step(node, step)
+        if node is _NOT_SET:
+            return False 
+    return node is obj 
+
+def _cache_path(cache: weakref.WeakValueDictionary, path: str, obj) -> None:
+    try:
+        cache[path] = obj 
+    except TypeError: # not weak referenceable (e.g. a config value)
+        pass 
+
+async def _abuild_tree(obj, depth: int):
+    """ Build asynchronously a tree of systems, see BaseSystem.abuild_all """
+    asyncio = _lazy_import("asyncio")
+    if isinstance(obj, BaseSystem):
+        await asyncio.gather( *(_abuild_slot(obj, slot, depth) for slot in obj.__subsystem_slots__.values()) )
+    elif isinstance(obj, _LazyContainer):
+        return 
+    elif depth and isinstance(obj, (SystemDict, SystemList)):
+        systems = obj.values() if isinstance(obj, SystemDict) else obj
+        await asyncio.gather( *(_abuild_tree(system, depth-1) for system in systems) )
+
+async def _abuild_slot(parent: "BaseSystem", slot: SubsystemSlot, depth: int):
+    obj = await parent.aget(slot.name)
+    if depth and obj is not None:
+        await _abuild_tree(obj, depth-1)
+
+
+
+def _is_same_value(old, new) -> bool:
+    return old is new or (type(old) is type(new) and old == new)
+
+def _get_field_slots(system: "BaseSystem") -> Dict[str, SubsystemSlot]:
+    """ config field name -> subsystem slot of a system """
+    return {slot.descriptor.attr:slot for slot in system.__subsystem_slots__.values() 
+            if isinstance(slot.descriptor, BaseFactoryAttribute)}
+
+class _Reconfigurator:
+    """ Update the built subsystems of a system after a change of its config 
+
+    For each modified field holding a built subsystem: 
+        - a factory of the same class whose plain values are unchanged is adopted 
+          by the built subsystem (its __config__ is replaced) and the comparison 
+          goes on with the subsystem fields 
+        - otherwise the subsystem is rebuilt 
+    Dictionaries and lists are compared item by item. Rebuilt (or removed) 
+    paths are collected in `rebuilt`. 
+
+    Every modification of the built systems is recorded, `rollback` restores 
+    them all (e.g. when a build fails in the middle of the update). 
+    """
+    def __init__(self):
+        self.rebuilt = []
+        self._undo = [] # (container, key, previous value), key is _NOT_SET for a list copy 
+    
+    def set_item(self, container: dict, key, value) -> None:
+        self._undo.append( (container, key, container.get(key, _NOT_SET)) )
+        container[key] = value 
+    
+    def del_item(self, container: dict, key) -> None:
+        self._undo.append( (container, key, container[key]) )
+        del container[key]
+    
+    def save_list(self, container: list) -> None:
+        self._undo.append( (container, _NOT_SET, list(container)) )
+    
+    def rollback(self) -> None:
+        """ undo all modifications of built systems, last first """
+        for container, key, previous in reversed(self._undo):
+            if key is _NOT_SET:
+                container[:] = previous 
+            elif previous is _NOT_SET:
+                container.pop(key, None)
+            else:
+                container[key] = previous 
+        self._undo = []
+        self.rebuilt = []
+
+    def reconcile_fields(self, system: "BaseSystem", changes: Dict[str, Tuple[Any, Any]]) -> None:
+        slots = _get_field_slots(system)
+        for name, (old, new) in changes.items():
+            slot = slots.get(name, None)
+            if slot is not None:
+                if slot.is_built(system):
+                    self.reconcile_slot(system, slot, old, new)
+            elif name in system.__dict__ and isinstance(old, BaseFactory):
+                # extra config attribute built by _get_extra_config_attribute 
+                built = system.__dict__[name]
+                self.set_item(system.__dict__, name, self.reconcile_factory(system, name, built, old, new))
+    
+    def reconcile_slot(self, system: "BaseSystem", slot: SubsystemSlot, old, new) -> None:
+        key = slot.key 
+        built = system.__dict__[key]
+        if slot.member_type == MemberType.Factory:
+            if new is None:
+                self.del_item(system.__dict__, key)
+                self.rebuilt.append( BaseFactory._make_new_path(system, key) )
+            else:
+                self.set_item(system.__dict__, key, self.reconcile_factory(system, key, built, old, new))
+        elif isinstance(built, _LazyContainer) or not self.reconcile_container(system, key, built, old, new):
+            # rebuilt as a whole 
+            self.del_item(system.__dict__, key)
+            getattr(system, slot.name)
+            self.rebuilt.append( BaseFactory._make_new_path(system, key) )
+    
+    def reconcile_factory(self, parent, name: str, built, old, new):
+        """ return the system to keep for factory new: built or a new one """
+        if old is new:
+            return built 
+        if isinstance(built, BaseSystem) and built.__config__ is old and type(old) is type(new):
+            changes = self.get_changes(old, new)
+            if changes is not None:
+                self.set_item(built.__dict__, '__config__', new)
+                if _subscriptions['count']:
+                    _attach_config(built, new)
+                    _notify(built, changes)
+                self.reconcile_fields(built, changes)
+                return built 
+        elif _is_same_value(old, new):
+            return built 
+        system = new.build(parent, name)
+        self.rebuilt.append( BaseFactory._make_new_path(parent, name) )
+        return system 
+    
+    def reconcile_container(self, parent, name: str, built, old, new) -> bool:
+        """ reconcile items of a SystemDict or SystemList, False if it must be rebuilt as a whole """
+        if old is new:
+            return True 
+        if old is None or new is None:
+            return False 
+        if isinstance(built, SystemDict):
+            if set(built.data) != set(old.keys()):
+                return False # modified after build 
+            item_name = FactoryDict._item_name
+            keys = list(new.keys())
+            for key in list(built.data):
+                if key not in new:
+                    self.del_item(built.data, key)
+                    self.rebuilt.append( BaseFactory._make_new_path(parent, item_name(name, key)) )
+        else:
+            if len(built.data) != len(old):
+                return False 
+            item_name = FactoryList._item_name
+            keys = range(len(new))
+            self.save_list(built.data)
+            for index in range(len(new), len(built.data)):
+                self.rebuilt.append( BaseFactory._make_new_path(parent, item_name(name, index)) )
+            del built.data[len(new):]
+        
+        for key in keys:
+            if isinstance(built, SystemDict) and key not in built.data or isinstance(built, SystemList) and key >= len(built.data):
+                system = new[key].build(parent, item_name(name, key))
+                self.rebuilt.append( BaseFactory._make_new_path(parent, item_name(name, key)) )
+                if isinstance(built, SystemDict):
+                    self.set_item(built.data, key, system)
+                else:
+                    built.data.append(system)
+            else:
+                system = self.reconcile_factory(parent, item_name(name, key), built.data[key], old[key], new[key])
+                if isinstance(built, SystemDict):
+                    self.set_item(built.data, key, system)
+                else:
+                    built.data[key] = system # the list is saved 
+        return True 
+    
+    @staticmethod
+    def get_changes(old: BaseFactory, new: BaseFactory) -> Optional[Dict[str, Tuple[Any, Any]]]:
+        """ modified subsystem fields between two factories of the same class 
+        
+        None is returned if a plain value has changed 
+        """
+        member_types = type(old).__member_types__
+        changes = {}
+        for name in set(old.__dict__).union(new.__dict__):
+            old_value = old.__dict__.get(name, None)
+            new_value = new.__dict__.get(name, None)
+            if old_value is new_value:
+                continue 
+            try:
+                member_type = member_types[name].member_type 
+            except KeyError: # extra attribute 
+                member_type = MemberType.Factory if isinstance(old_value, BaseFactory) else MemberType.Other 
+            if member_type == MemberType.Other:
+                if not _is_same_value(old_value, new_value):
+                    return None 
+            else:
+                changes[name] = (old_value, new_value)
+        return changes 
+
+
+
+def _validate_config_changes(config: BaseFactory, changes: Dict[str, Any]) -> Dict[str, Any]:
+    """ validate new field values of a config, as validate_assignment would do 
+
+    Each field is validated once and the root validators are called once for all 
+    the changes. The config is not modified, the full dictionary of new values is returned. 
+    """
+    cls = type(config)
+    # the same refusals than an assignment 
+    if not cls.__config__.allow_mutation or cls.__config__.frozen:
+        raise TypeError(f'"{cls.__name__}" is immutable and does not support item assignment')
+    for name in changes:
+        field = cls.__fields__.get(name, None)
+        if field is None:
+            continue 
+        if field.final:
+            raise TypeError(f'"{cls.__name__}" object "{name}" field is final and does not support reassignment')
+        if cls.__config__.validate_assignment and not field.field_info.allow_mutation:
+            raise TypeError(f'"{name}" has allow_mutation set to False and cannot be assigned')
+    
+    new_values = {**config.__dict__, **changes}
+    for validator in cls.__pre_root_validators__:
+        new_values = validator(cls, new_values)
+    
+    errors = []
+    for name in changes:
+        field = cls.__fields__.get(name, None)
+        if field is None:
+            if cls.__config__.extra != Extra.allow:
+                errors.append( ErrorWrapper(ValueError(f"{cls.__name__} has no field {name!r}"), loc=name) )
+            continue 
+        others = {k:v for k,v in new_values.items() if k != name}
+        value, error = field.validate(new_values[name], others, loc=name, cls=cls)
+        if error:
+            errors.append(error)
+        else:
+            new_values[name] = value 
+    if errors:
+        raise ValidationError(errors, cls)
+    
+    for skip_on_failure, validator in cls.__post_root_validators__:
+        new_values = validator(cls, new_values)
+    return new_values 
+
+def _replace_items(container, items: Dict[Any, Any]):
+    """ a copy of a dict or list of factories with some items replaced """
+    if isinstance(container, (FactoryDict, dict)):
+        new = dict(container.items())
+        new.update(items)
+        if isinstance(container, FactoryDict):
+            return FactoryDict.parse_trusted(new, container.__Factory__)
+        return new 
+    new = list(container)
+    for index, item in items.items():
+        new[index] = item 
+    if isinstance(container, FactoryList):
+        return FactoryList.parse_trusted(new, container.__Factory__)
+    return new 
+
+
+class ReconfigureTransaction:
+    """ Changes of config values in a tree of systems, applied all at once 
+
+    Changes are addressed by path: the path of a subsystem relative to the root 
+    system followed by the field name, e.g. "motors['x'].speed" or "speed" for 
+    the root system itself. See BaseSystem.batch_reconfigure. 
+    """
+    def __init__(self, system: "BaseSystem"):
+        self.system = system 
+        self.changes: Dict[str, Any] = {}
+        self.rebuilt: Optional[List[str]] = None 
+    
+    def __enter__(self) -> "ReconfigureTransaction":
+        return self 
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.apply()
+    
+    def set(self, path: str, value: Any) -> None:
+        """ record a new value for the field at path """
+        steps = parse_system_path(path)
+        if not steps or steps[-1][0] != "attr":
+            raise ValueError(f"path {path!r} does not end with a field name")
+        self.changes[path] = value 
+    
+    def update(self, path: str, values: Dict[str, Any]) -> None:
+        """ record new values for several fields of the config at path ("" for the root) """
+        for name, value in values.items():
+            self.set(join_path(path, name) if path else name, value)
+    
+    def apply(self) -> List[str]:
+        """ Validate and apply all recorded changes 
+
+        Every config which receives changes is validated once, before anything 
+        is modified: if one of them fails, a ValidationError (or ValueError) is 
+        raised and nothing is changed. The new configs are then copied up to the 
+        root (configs of unchanged branches are shared) and built subsystems are 
+        updated in one pass, as for BaseSystem.reconfigure. 
+
+        Returns:
+            rebuilt (list[str]): paths of the rebuilt (or removed) subsystems 
+        """
+        root_config = self.system.__config__ 
+        
+        # group changes by the path of their config 
+        groups: Dict[Tuple, Dict[str, Any]] = {}
+        for path, value in self.changes.items():
+            steps = parse_system_path(path)
+            groups.setdefault(steps[:-1], {})[steps[-1][1]] = value 
+        
+        # validate everything first 
+        originals = {}
+        validated = {}
+        for prefix, changes in groups.items():
+            obj = root_config 
+            for step in prefix:
+                try:
+                    obj = _resolve_path_step(obj, step)
+                except (AttributeError, KeyError, IndexError, TypeError) as e:
+                    raise ValueError(f"cannot resolve config path {prefix!r}: {e!r}") from e 
+            if not isinstance(obj, BaseFactory):
+                raise ValueError(f"object at path {prefix!r} is not a config")
+            originals[prefix] = obj 
+            new_values = _validate_config_changes(obj, changes)
+            validated[prefix] = {k:v for k,v in new_values.items() if v is not obj.__dict__.get(k, None) or k in changes}
+        
+        # new objects are created from the deepest paths to the root 
+        replacements: Dict[Tuple, Dict[Any, Any]] = {} # parent path -> {attr or key: new object}
+        # deepest first, in the order of the changes for a given depth 
+        order: Dict[Tuple, int] = {}
+        for prefix in groups:
+            for i in range(len(prefix)+1):
+                order.setdefault(prefix[:i], len(order))
+        
+        root_values = {}
+        new_configs = {}
+        for prefix in sorted(order, key=lambda prefix: (-len(prefix), order[prefix])):
+            children = replacements.pop(prefix, {})
+            values = validated.get(prefix, {})
+            for name in children:
+                if name in values:
+                    raise ValueError(f"field {name!r} at {prefix!r} is changed twice (directly and through its content)")
+            if not prefix:
+                root_values = {**values, **children}
+                break 
+            obj = originals.get(prefix, None)
+            if obj is None:
+                obj = _resolve_path(root_config, prefix, repr(prefix))
+            if isinstance(obj, (FactoryDict, FactoryList, dict, list)):
+                new = _replace_items(obj, children)
+            else:
+                new = obj.copy(update={**values, **children})
+                new_configs[prefix] = new 
+            replacements.setdefault(prefix[:-1], {})[prefix[-1][1]] = new 
+        
+        # apply on the root config, restored if the update of the built systems fails 
+        old_values = {name:root_config.__dict__.get(name, None) for name in root_values}
+        old_root_dict = dict(root_config.__dict__)
+        with _restore_on_failure(root_config):
+            root_config.__dict__.update(root_values)
+            root_config.__fields_set__.update(root_values)
+            _config_modified(root_config)
+            self.rebuilt = self.system._reconcile(old_values)
+            # subscribers receive the changed values of each config, the new configs 
+            # are owned by the updated (or rebuilt) systems 
+            new_configs[()] = root_config 
+            for prefix, values in validated.items():
+                old_dict = originals[prefix].__dict__ if prefix else old_root_dict 
+                changes = {name:(old_dict.get(name, None), value) for name, value in values.items() 
+                           if not _is_same_value(old_dict.get(name, _NOT_SET), value)}
+                if changes:
+                    _config_changed(new_configs[prefix], changes)
+        self.changes = {}
+        return self.rebuilt 
+
         
 def _is_subsystem_iterable(system):
     return isinstance( system , (BaseSystem, SystemDict, SystemList))
 
 
+_find_factories_cache = weakref.WeakKeyDictionary() # class -> {(SubClass, include, exclude): result}
+_find_factories_lock = threading.Lock()
+
 def find_factories(cls,  
         SubClass=(BaseSystem, SystemDict, SystemList), 
         include:Optional[set] = None, 
         exclude:Optional[set] = None
-    )-> List[Tuple[str, BaseFactory]]:
+    )-> Iterator[Tuple[str, BaseFactory]]:
     """ find factories defined inside a system class 
 
     The factories are matched thanks to a Class or a tuple of Classes 
     of subsystems built by the factory
     
-    Note1 find_factories is a generator
+    Note1 find_factories returns an iterator
     Note2 all attribute starting with "__" are skiped 
     Note3 find_factories is not recursive
+    Note4 results are cached per class and arguments (the cache of a class is 
+          dropped by systemclass). The returned factories are the class attributes 
+          and field defaults themselves (not copies) and must not be modified. 
+          A factory set on the class afterward (e.g. MySystem.motor = Motor.Config()) 
+          is found after clear_find_factories_cache(MySystem). 
 
     Args:
         cls : The root class to search 
@@ -573,25 +2211,87 @@ def find_factories(cls,
         exclude (optional, set[str]): Exclude this set of attribute 
 
     Returns:
-        generator of tuple of: 
+        iterator of tuple of: 
             attr (str): attribute name 
             factory (BaseFactory): matched factories  
     """
-    
+    key = (
+        SubClass, 
+        None if include is None else tuple(include), 
+        None if exclude is None else frozenset(exclude)
+    )
+    try:
+        return iter(_find_factories_cache[cls][key])
+    except KeyError:
+        pass 
+    except TypeError: # unhashable arguments or class, no cache 
+        return iter(tuple(_find_factories(cls, SubClass, include, exclude or set())))
+    found = tuple(_find_factories(cls, SubClass, include, exclude or set()))
+    with _find_factories_lock:
+        _find_factories_cache.setdefault(cls, {})[key] = found 
+    return iter(found)
+
+def clear_find_factories_cache(cls: Optional[type] = None) -> None:
+    """ Drop the cached find_factories results of a class and its subclasses 
+
+    To be called when class attributes are modified after the class creation. 
+    By default the results of all classes are dropped. 
+    """
+    if cls is None:
+        with _find_factories_lock:
+            _find_factories_cache.clear()
+        return 
+    with _find_factories_lock:
+        _find_factories_cache.pop(cls, None)
+    for subcl in type.__subclasses__(cls):
+        clear_find_factories_cache(subcl)
+
+def _get_class_attribute(cls, attr: str):
+    """ return a class attribute as stored in the class __dict__, no descriptor is called """
+    for subcl in cls.__mro__:
+        try:
+            return subcl.__dict__[attr]
+        except KeyError:
+            continue
+    raise AttributeError(attr)
+
+def _get_field_default(field):
+    """ the default of a field, without copy """
+    if field.default_factory is not None:
+        return field.default_factory()
+    return field.default 
+
+def _iter_class_attribute_names(cls) -> Iterable[str]:
+    """ the attribute names of a class in the order of dir() """
+    names = set()
+    for subcl in cls.__mro__:
+        names.update(subcl.__dict__)
+    return sorted(names)
+
+def _find_factories(cls, SubClass, include, exclude):
     found = set()
-    iterator = dir(cls) if include is None else include
+    is_system = isinstance(cls, type) and issubclass(cls, BaseSystem)
+    if is_system:
+        Config = cls.Config 
+        fields = Config.__fields__
+        member_types = Config.__member_types__
     
-    if exclude is None: 
-        exclude = set() 
+    iterator = _iter_class_attribute_names(cls) if include is None else include
     for attr in iterator:
         if attr.startswith("__"): continue
         if attr == "Config": continue 
         if attr in exclude: continue
         
         try:
-            obj = getattr( cls, attr)
+            obj = _get_class_attribute(cls, attr)
         except AttributeError:
             continue 
+        if isinstance(obj, SubsystemAttribute) and is_system:
+            # the class attribute is the default of the Config field 
+            try:
+                obj = _get_field_default(fields[obj.attr])
+            except KeyError:
+                continue 
         if not isinstance(obj, BaseFactory):
             continue
         
@@ -605,10 +2305,9 @@ def find_factories(cls,
         found.add(attr)
         yield (attr,obj) 
     
-    if not issubclass(cls, BaseSystem):
+    if not is_system:
        return 
-
-    fields = cls.Config.__fields__                 
+    
     iterator = fields if include is None else include
     for attr  in iterator:
          
@@ -619,16 +2318,13 @@ def find_factories(cls,
         except KeyError:
             continue 
         
-        
-        try:
-            obj = field.get_default()
-        except (ValueError, TypeError):
-            continue 
-        
-        field_type =  _get_field_type(field) 
+        field_type = member_types[attr].member_type 
         if field_type == MemberType.Other:
             continue
-        
+
+        obj = _get_field_default(field)
+        if obj is None:
+            continue 
 
         if field_type == MemberType.FactoryList:
             if isinstance(obj, FactoryList):
@@ -653,23 +2349,22 @@ def find_factories(cls,
             yield (attr, obj)
     
 def has_factory(cls, attr):
-    try:
-        factory = getattr(cls,attr)
-    except AttributeError:
-        try: 
-            field = cls.Config.__fields__[attr]
-        except KeyError:
-            return False
+    """ True if the class has a factory, a list or a dict of factories as attribute attr 
 
-        field_type =  _get_field_type(field)
-        if field_type == MemberType.Other:
-            return False 
-        return True 
+    No descriptor is called and no default factory is copied. 
+    """
+    for subcl in cls.__mro__:
+        try:
+            obj = subcl.__dict__[attr]
+        except KeyError:
+            continue 
+        return isinstance(obj, (BaseFactory, BaseFactoryAttribute))
     
-    print( factory )
-    if not isinstance(factory, (BaseFactory, BaseFactoryAttribute)):
+    try:
+        member = cls.Config.__member_types__[attr]
+    except KeyError:
         return False
-    return True
+    return member.member_type != MemberType.Other
     
 
 
@@ -1,7 +1,9 @@
-from typing import Dict, List, Optional
+import gc
+from typing import Any, Dict, List, Optional
+from pydantic import Field
 import pytest
 
-from systemy.system import BaseFactory, BaseSystem, BaseConfig, FactoryDict, FactoryList, SystemDict, SystemList, factory , find_factories,  has_factory
+from systemy.system import ConfigValueAttribute, clear_find_factories_cache, systemclass, BaseFactory, BaseSystem, BaseConfig, FactoryDict, FactoryList, SystemDict, SystemList, factory , find_factories,  has_factory, MemberType, LazySystemDict, LazySystemList, build_contention_count, parse_system_path, notification_batch
 
 def test_config_class_creation():
     
@@ -124,6 +126,41 @@ def test_set_config_attribute_must_be_value_error():
     assert s.a == 2
 
 
+def test_config_value_attribute():
+    class X(BaseSystem):
+        pass 
+
+    class S(BaseSystem):
+        class Config:
+            a: int = 0
+            l: List[float] = []
+            anything: Any = None 
+    
+    assert isinstance(S.__dict__['a'], ConfigValueAttribute)
+    assert isinstance(S.__dict__['l'], ConfigValueAttribute)
+    assert not isinstance(S.__dict__['anything'], ConfigValueAttribute)
+    
+    s = S(a=1, anything=X.Config())
+    assert s.a == 1 
+    assert isinstance(s.anything, X)
+    s.reconfigure(a=2)
+    assert s.a == 2 
+    with pytest.raises(ValueError):
+        s.a = 3 
+    
+    # an inherited plain field retyped to a factory builds its subsystem 
+    class B(S):
+        class Config:
+            a: X.Config = X.Config()
+            l: Any = []
+    
+    assert not isinstance(B.__dict__['a'], ConfigValueAttribute)
+    b = B()
+    assert isinstance(b.a, X)
+    assert b.a.__path__ == "a"
+    assert isinstance(B(l=X.Config()).l, X)
+    assert S().a == 0 
+
 def test_reconfigure():
     class S(BaseSystem):
         class Config:
@@ -132,6 +169,266 @@ def test_reconfigure():
     s.reconfigure( a=10)
     assert s.a == 10
 
+def test_incremental_reconfigure():
+    class Window(BaseSystem):
+        class Config:
+            opened: bool = False 
+
+    class Room(BaseSystem):
+        class Config:
+            width: float = 1.0
+            window: Window.Config = Window.Config()
+
+    class House(BaseSystem):
+        class Config:
+            kitchen: Room.Config = Room.Config()
+            garage: Room.Config = Room.Config()
+            rooms: Dict[str, Room.Config] = {}
+            floors: List[Room.Config] = []
+            name: str = ""
+    
+    house = House(rooms={'a':{}, 'b':{}}, floors=[{}, {}])
+    kitchen, garage, rooms, floors = house.kitchen, house.garage, house.rooms, house.floors
+    window = kitchen.window 
+    assert house.get_path("rooms['a']") is rooms['a']
+
+    assert house.reconfigure(name="home") == []
+    
+    # only the window has a new value, the kitchen is kept 
+    new_kitchen = house.__config__.kitchen.copy(deep=True)
+    new_kitchen.window.opened = True 
+    assert house.reconfigure(kitchen=new_kitchen) == ["kitchen.window"]
+    assert house.kitchen is kitchen 
+    assert kitchen.__config__ is new_kitchen
+    assert kitchen.window is not window and kitchen.window.opened 
+    
+    # equal factory, nothing is rebuilt 
+    assert house.reconfigure(garage=Room.Config()) == []
+    assert house.garage is garage 
+
+    rooms_config = dict(house.__config__.rooms)
+    rooms_config['b'] = Room.Config(width=2.0)
+    rooms_config['c'] = Room.Config()
+    del rooms_config['a']
+    rebuilt = house.reconfigure(rooms=rooms_config)
+    assert sorted(rebuilt) == ["rooms['a']", "rooms['b']", "rooms['c']"]
+    assert house.rooms is rooms 
+    assert list(rooms) == ['b', 'c']
+    assert rooms['b'].width == 2.0 
+    assert house.get_path("rooms['b']") is rooms['b']
+    
+    floor = floors[0]
+    assert house.reconfigure(floors=[house.__config__.floors[0], Room.Config(width=3.0)]) == ["floors[1]"]
+    assert house.floors[0] is floor 
+    assert house.floors[1].width == 3.0 
+    assert house.reconfigure(floors=[]) == ["floors[0]", "floors[1]"]
+    assert len(house.floors) == 0
+
+def test_batch_reconfigure():
+    class Motor(BaseSystem):
+        class Config:
+            speed: float = 1.0
+            name: str = ""
+
+    class Stage(BaseSystem):
+        class Config:
+            x: Motor.Config = Motor.Config()
+            y: Motor.Config = Motor.Config()
+            motors: Dict[str, Motor.Config] = {}
+            rate: int = 10 
+    
+    stage = Stage(motors={'a':{}, 'b':{}})
+    x, y, motors = stage.x, stage.y, stage.motors 
+    a, b = motors['a'], motors['b']
+    config = stage.__config__
+    x_config = config.x 
+    
+    with stage.batch_reconfigure() as tx:
+        tx.set("x.speed", "2.0")
+        tx.set("motors['b'].speed", 3.0)
+        tx.update("motors['b']", {'name':"b"})
+        tx.set("rate", 20)
+    assert sorted(tx.rebuilt) == ["motors['b']", "x"]
+    assert stage.__config__ is config 
+    assert stage.rate == 20 
+    assert stage.x is not x and stage.x.speed == 2.0 
+    assert x_config.speed == 1.0 # the old config is not modified 
+    assert stage.y is y 
+    assert stage.motors is motors and motors['a'] is a 
+    assert motors['b'].speed == 3.0 and motors['b'].name == "b"
+    
+    # nothing is applied if one change is invalid 
+    with pytest.raises(ValueError):
+        with stage.batch_reconfigure() as tx:
+            tx.set("y.speed", 5.0)
+            tx.set("motors['a'].speed", "not a number")
+    assert stage.y is y and y.speed == 1.0 
+    assert motors['a'].speed == 1.0
+    
+    # fields which cannot be assigned cannot be reconfigured either 
+    class Frozen(BaseSystem):
+        class Config:
+            a: int = 0
+            class Config:
+                allow_mutation = False 
+    class Holder(BaseSystem):
+        class Config:
+            f: Frozen.Config = Frozen.Config()
+            fixed: int = Field(0, allow_mutation=False)
+            rate: int = 0 
+            class Config:
+                validate_assignment = True 
+    holder = Holder()
+    with pytest.raises(TypeError):
+        holder.__config__.fixed = 1 
+    for path in ["fixed", "f.a"]:
+        with pytest.raises(TypeError):
+            with holder.batch_reconfigure() as tx:
+                tx.set("rate", 1)
+                tx.set(path, 1)
+        assert holder.fixed == 0 and holder.f.a == 0 and holder.rate == 0 
+    
+    with pytest.raises(ValueError):
+        with stage.batch_reconfigure() as tx:
+            tx.set("y.unknown", 5.0)
+    
+    # nothing is applied if the block raises 
+    with pytest.raises(RuntimeError):
+        with stage.batch_reconfigure() as tx:
+            tx.set("rate", 30)
+            raise RuntimeError()
+    assert stage.rate == 20 
+
+def test_batch_reconfigure_rollback():
+    class A(BaseSystem):
+        class Config:
+            x: int = 0 
+    
+    class B(BaseSystem):
+        class Config:
+            fail: bool = False 
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            if self.fail:
+                raise RuntimeError("build failed")
+    
+    class R(BaseSystem):
+        class Config:
+            a: A.Config = A.Config()
+            b: B.Config = B.Config()
+            items: List[A.Config] = [A.Config(), A.Config()]
+    
+    r = R()
+    a, b, items = r.a, r.b, r.items 
+    item0 = items[0]
+    config = r.__config__ 
+    received = []
+    unsubscribe = r.subscribe(received.append, subtree=True)
+    try:
+        with pytest.raises(RuntimeError):
+            with r.batch_reconfigure() as tx:
+                tx.set("a.x", 5)
+                tx.set("items[0].x", 5)
+                tx.set("b.fail", True)
+        assert r.__config__ is config and config.a.x == 0 and not config.b.fail 
+        assert r.a is a and r.a.x == 0 
+        assert r.b is b 
+        assert r.items is items and list(items) == [item0, items[1]] and items[0].x == 0 
+        
+        with pytest.raises(RuntimeError):
+            r.reconfigure(a=A.Config(x=3), b=B.Config(fail=True))
+        assert r.a is a and config.a.x == 0 and not config.b.fail 
+        assert received == []
+    finally:
+        unsubscribe()
+
+def test_config_notifications():
+    class Motor(BaseSystem):
+        _allow_config_assignment = True 
+        class Config:
+            speed: float = 1.0
+            name: str = ""
+
+    class Stage(BaseSystem):
+        _allow_config_assignment = True 
+        class Config:
+            x: Motor.Config = Motor.Config()
+            motors: Dict[str, Motor.Config] = {}
+            rate: int = 10 
+    
+    stage = Stage(motors={'a':{}})
+    stage.motors # built before any subscription 
+    received, subtree, speeds = [], [], []
+    subscriptions = [stage.subscribe(received.append)]
+    try:
+        generation = stage.__config__.get_generation()
+        stage.rate = 20
+        assert received == [[("", "rate", 10, 20)]]
+        assert stage.__config__.get_generation() != generation 
+        generation = stage.__config__.get_generation()
+        stage.rate = 20 # same value, nothing changes 
+        assert len(received) == 1 and stage.__config__.get_generation() == generation 
+    
+        # changes are coalesced 
+        received.clear()
+        with notification_batch():
+            stage.rate = 30
+            stage.rate = 40 
+            stage.__config__.update(rate=50)
+        assert received == [[("", "rate", 20, 50)]]
+    
+        # subtree and field subscriptions 
+        subscriptions.append( stage.subscribe(subtree.append, subtree=True) )
+        subscriptions.append( stage.subscribe(speeds.append, field="speed", subtree=True) )
+        received.clear()
+        stage.x.speed = 2.0 
+        stage.motors['a'].name = "a"
+        assert received == []
+        assert subtree == [[("x", "speed", 1.0, 2.0)], [("motors['a']", "name", "", "a")]]
+        assert speeds == [[("x", "speed", 1.0, 2.0)]]
+    
+        subtree.clear()
+        with stage.batch_reconfigure() as tx:
+            tx.set("motors['a'].speed", 3.0)
+            tx.set("rate", 60)
+        assert sorted(subtree[0]) == [("", "rate", 50, 60), ("motors['a']", "speed", 1.0, 3.0)]
+        assert len(subtree) == 1 
+    
+        subscriptions[0]()
+        received.clear()
+        subtree.clear()
+        stage.reconfigure(rate=70)
+        assert received == []
+        assert subtree == [[("", "rate", 60, 70)]]
+
+        # in an event loop, changes are dispatched at the end of the tick 
+        import asyncio 
+        async def main():
+            subtree.clear()
+            stage.rate = 1 
+            stage.rate = 2 
+            assert subtree == []
+            await asyncio.sleep(0)
+            assert subtree == [[("", "rate", 70, 2)]]
+        asyncio.run(main())
+    finally:
+        for unsubscribe in subscriptions:
+            unsubscribe()
+
+def test_subscription_released_with_system():
+    class Motor(BaseSystem):
+        class Config:
+            speed: float = 1.0
+
+    motor = Motor()
+    motor.subscribe(print)
+    del motor 
+    gc.collect()
+    # no subscription left, an assignment does not record anything 
+    config = Motor.Config()
+    config.speed = 2.0 
+    assert config.__config_state__ is None 
+
 def test_optional_subsystem():
 
     class S1(BaseSystem):
@@ -170,6 +467,68 @@ def test_children_iterator():
     assert list( s.children( (S1,S2) )) == ["s1", "s2"] 
     
 
+def test_subsystem_slots():
+    class S1(BaseSystem):
+        ...
+
+    class S0(BaseSystem):
+        class Config:
+            s1 = S1.Config()
+            l: List[S1.Config] = []
+            d: Dict[str, S1.Config] = {}
+            a: int = 0
+        s2 = S1.Config()
+        f = FactoryList()
+    
+    assert list(S0.__subsystem_slots__) == ["d", "f", "l", "s1", "s2"]
+    assert S0.__subsystem_slots__['d'].member_type == MemberType.FactoryDict
+    assert S0.__subsystem_slots__['f'].member_type == MemberType.FactoryList
+    assert S0.__subsystem_slots__['s2'].member_type == MemberType.Factory
+    
+    class S00(S0):
+        s2 = None 
+    assert "s2" not in S00.__subsystem_slots__
+    assert "s1" in S00.__subsystem_slots__
+
+
+def test_find_built_only():
+    class S1(BaseSystem):
+        ...
+    class S0(BaseSystem):
+        class Config:
+            s1 = S1.Config()
+            s2 = S1.Config()
+    
+    s = S0()
+    assert list(s.find(S1, built_only=True)) == []
+    assert list(s.children(built_only=True)) == []
+    assert "s1" not in s.__dict__
+    s.s2
+    assert list(s.find(S1, built_only=True)) == [s.s2]
+    assert list(s.children(built_only=True)) == ["s2"]
+    assert len(list(s.find(S1))) == 2
+
+
+def test_find_instance_subsystems():
+    class M(BaseSystem):
+        ...
+    class S(BaseSystem):
+        class Config:
+            m1 = M.Config()
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.manual = M()
+        @property 
+        def prop(self):
+            return M()
+    
+    s = S()
+    assert list(s.children()) == ["m1", "manual"]
+    assert list(s.find(M)) == [s.m1, s.manual]
+    # subsystems returned by properties are not visited 
+    assert "prop" not in list(s.children())
+
+
 def test_append_factory_in_list():
     class S(BaseSystem):
         pass 
@@ -199,6 +558,379 @@ def test_append_factory_in_list():
     assert list(ss.l.children( BaseSystem)) == []
 
 
+def test_lazy_factory_dict():
+    built = []
+    class Channel(BaseSystem):
+        class Config:
+            num: int = 0
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            built.append(self.__path__)
+
+    class Device(BaseSystem):
+        class Config:
+            channels: Dict[str, Channel.Config] = Field( 
+                    {str(i):Channel.Config(num=i) for i in range(10)}, lazy=True, maxsize=2
+                )
+    
+    device = Device()
+    assert isinstance(device.channels, LazySystemDict)
+    assert len(device.channels) == 10 
+    assert built == []
+    c3 = device.channels['3']
+    assert c3.num == 3 
+    assert c3.__path__ == "channels['3']"
+    assert device.channels['3'] is c3
+    assert built == ["channels['3']"]
+    assert "4" in device.channels 
+    assert list(device.find(Channel, 1, built_only=True)) == [c3] 
+    
+    device.channels['4']
+    device.channels['5'] # 3 is dropped 
+    assert not device.channels.is_built('3')
+    assert device.channels.is_built('5')
+    assert device.channels['3'] is not c3 
+
+    s = Channel()
+    device.channels['new'] = s 
+    assert device.channels['new'] is s 
+    del device.channels['0']
+    assert len(device.channels) == 10 
+    
+    assert len(list(device.find(Channel, 1))) == 10 
+    
+def test_lazy_items_built_concurrently():
+    from concurrent.futures import ThreadPoolExecutor
+    import threading
+    # each build waits for the other one, this only passes if they run at the same time 
+    barrier = threading.Barrier(2, timeout=5)
+    class Channel(BaseSystem):
+        class Config:
+            num: int = 0
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            barrier.wait()
+
+    channels = FactoryDict({'a':Channel.Config(), 'b':Channel.Config(num=1)}).build(None, "channels", lazy=True)
+    with ThreadPoolExecutor(2) as executor:
+        built = list(executor.map(lambda key: channels[key], ['a', 'b']))
+    assert [c.num for c in built] == [0, 1]
+    assert channels['a'] is built[0]
+
+def test_lazy_factory_list():
+    class Channel(BaseSystem):
+        class Config:
+            num: int = 0
+
+    factories = FactoryList([Channel.Config(num=i) for i in range(5)])
+    channels = factories.build(None, "channels", lazy=True)
+    assert isinstance(channels, LazySystemList)
+    assert not channels.is_built(2)
+    assert channels[-1].num == 4 
+    assert channels[4].__path__ == "channels[4]"
+    assert channels.is_built(4)
+    c = channels[2]
+    channels.insert(0, Channel.Config(num=9))
+    assert channels[3] is c
+    assert channels[0].num == 9
+    assert [c.num for c in channels] == [9, 0, 1, 2, 3, 4]
+    channels.append( Channel.Config(num=10) )
+    assert channels.pop().num == 10 
+    assert len(channels) == 6
+    for index in (-7, 6):
+        with pytest.raises(IndexError):
+            channels[index]
+    assert [channels.is_built(i) for i in range(6)] == [True]*6
+    
+    channels = factories.build(None, "channels", lazy=True)
+    with pytest.raises(IndexError):
+        channels[-6]
+    assert not any(channels.is_built(i) for i in range(5))
+
+
+def test_build_all():
+    import threading, time 
+    threads = set() 
+    lock = threading.Lock()
+    running = [0, 0] # current, peak number of devices built at the same time 
+    class Device(BaseSystem):
+        class Config:
+            num: int = 0
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            threads.add(threading.get_ident())
+
+    class Crate(BaseSystem):
+        class Config:
+            d1 = Device.Config()
+            d2 = Device.Config()
+            devices: Dict[str, Device.Config] = {str(i):Device.Config(num=i) for i in range(4)}
+            lazy_devices: List[Device.Config] = Field([Device.Config()], lazy=True)
+        
+    class Rack(BaseSystem):
+        class Config:
+            crates: List[Crate.Config] = [Crate.Config(), Crate.Config()]
+            main = Crate.Config()
+    
+    rack = Rack()
+    rack.build_all(depth=0, max_workers=4)
+    assert "main" in rack.__dict__ and "crates" in rack.__dict__
+    assert list(rack.main.find(Device, 1, built_only=True)) == [] 
+    
+    rack = Rack()
+    running[1] = 0
+    rack.build_all(depth=-1, max_workers=8)
+    assert running[1] > 1
+    assert len(threads) > 1
+    assert len(list(rack.find(Device, -1, built_only=True))) == 18
+    assert rack.crates[1].devices['3'].num == 3 
+    assert rack.crates[1].devices['3'].__path__ == "crates[1].devices['3']"
+    assert not rack.main.lazy_devices.is_built(0)
+    assert rack.main.devices.__get_parent__() is rack.main
+
+
+def test_build_once_with_threads():
+    import threading, time 
+    built = []
+    class Device(BaseSystem):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            time.sleep(0.05)
+            built.append(self)
+
+    class Crate(BaseSystem):
+        device = Device.Config()
+    
+    crate = Crate()
+    contention = build_contention_count()
+    threads = [threading.Thread(target=lambda: crate.device) for i in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(built) == 1 
+    assert crate.device is built[0]
+    assert build_contention_count() > contention
+    # the lock is dropped once the subsystem is built 
+    assert crate.__dict__['__build_locks__'] == {}
+
+
+def test_async_build():
+    import asyncio 
+    log = {'running':0, 'max_running':0, 'ainit':[]}
+
+    class Device(BaseSystem):
+        class Config:
+            num: int = 0
+        async def __ainit__(self):
+            log['running'] += 1
+            log['max_running'] = max( log['max_running'], log['running'])
+            await asyncio.sleep(0.01)
+            log['running'] -= 1
+            log['ainit'].append(self.__path__)
+    
+    class Crate(BaseSystem):
+        class Config:
+            d1 = Device.Config()
+            devices: Dict[str, Device.Config] = {str(i):Device.Config(num=i) for i in range(4)}
+            lst: List[Device.Config] = [Device.Config(), Device.Config()]
+    
+    class Rack(BaseSystem):
+        class Config:
+            crates: List[Crate.Config] = [Crate.Config(), Crate.Config()]
+            main = Crate.Config()
+
+    async def main():
+        rack = Rack()
+        await rack.abuild_all(depth=-1, limit=3)
+        return rack
+    
+    rack = asyncio.run(main())
+    assert len(log['ainit']) == 21
+    assert log['max_running'] == 3
+    assert "crates[1].devices['2']" in log['ainit']
+    assert rack.crates[1].devices['2'].num == 2
+    assert rack.main.lst.__get_parent__() is rack.main
+
+    async def main2():
+        crate = Crate()
+        d1, d1_bis = await asyncio.gather( crate.aget("d1"), crate.aget("d1") )
+        assert d1 is d1_bis is crate.d1
+        devices = await Crate.Config().devices.abuild(None, "devices")
+        return devices
+    log['ainit'] = []
+    devices = asyncio.run(main2())
+    assert len(log['ainit']) == 5
+    assert devices['3'].__path__ == "devices['3']"
+
+
+def test_parse_system_path():
+    assert parse_system_path("a.b['x'][3]") == (("attr","a"), ("attr","b"), ("item","x"), ("item",3))
+    assert parse_system_path('rooms["x"]') == (("attr","rooms"), ("item","x"))
+    assert parse_system_path("") == ()
+    for wrong in [".a", "a..b", "a b", "a[x]", "a['x'"]:
+        with pytest.raises(ValueError):
+            parse_system_path(wrong)
+
+
+def test_get_path():
+    class Window(BaseSystem):
+        class Config:
+            width: float = 1.0
+    class Room(BaseSystem):
+        class Config:
+            windows: List[Window.Config] = [Window.Config(), Window.Config(width=2)]
+    class House(BaseSystem):
+        class Config:
+            rooms: Dict[str, Room.Config] = {'kitchen':Room.Config()}
+            garage = Room.Config()
+    
+    house = House()
+    w = house.get_path("rooms['kitchen'].windows[1]")
+    assert w is house.rooms['kitchen'].windows[1]
+    assert house.get_path(w.__path__) is w 
+    assert house.get_path("rooms['kitchen'].windows[1]") is w 
+    assert house.get_path("") is house 
+    assert house.get_path("garage.windows[0].width") == 1.0
+    
+    paths = ["garage.windows[0]", "garage.windows[1]", "rooms['kitchen']"]
+    assert house.get_paths(paths) == [house.garage.windows[0], house.garage.windows[1], house.rooms['kitchen']]
+    with pytest.raises(ValueError):
+        house.get_path("garage.windows[4]")
+    with pytest.raises(ValueError):
+        house.get_paths(["garage.door"])
+
+def test_get_path_after_tree_change():
+    class Window(BaseSystem):
+        class Config:
+            width: float = 1.0
+    class Room(BaseSystem):
+        class Config:
+            windows: List[Window.Config] = [Window.Config(), Window.Config(width=2)]
+            lazy_windows: List[Window.Config] = Field([Window.Config(), Window.Config()], lazy=True, maxsize=1)
+    class House(BaseSystem):
+        class Config:
+            rooms: Dict[str, Room.Config] = {'kitchen':Room.Config()}
+            garage = Room.Config()
+    
+    house = House()
+    kitchen = house.get_path("rooms['kitchen']")
+    window = house.get_path("rooms['kitchen'].windows[1]")
+    house.rooms['kitchen'] = Room.Config()
+    assert house.get_path("rooms['kitchen']") is house.rooms['kitchen'] is not kitchen 
+    assert house.get_paths(["rooms['kitchen'].windows[1]"]) == [house.rooms['kitchen'].windows[1]]
+    assert house.get_path("rooms['kitchen'].windows[1]") is not window 
+    
+    windows = house.garage.windows
+    first = house.get_path("garage.windows[0]")
+    windows.insert(0, Window.Config(width=3))
+    assert house.get_path("garage.windows[0]").width == 3 
+    assert house.get_path("garage.windows[1]") is first 
+    
+    garage = house.garage 
+    house.garage = Room()
+    assert house.get_path("garage") is house.garage is not garage 
+    
+    lazy = house.get_path("garage.lazy_windows[0]")
+    house.garage.lazy_windows[1] # drops the first one (maxsize=1) 
+    assert not house.garage.lazy_windows.is_built(0)
+    assert house.get_path("garage.lazy_windows[0]") is not lazy 
+    assert house.garage.lazy_windows.is_built(0)
+
+
+def test_parse_trusted():
+    class X(BaseSystem):
+        class Config:
+            a: int = 0
+            b: str = "b"
+    
+    class A(BaseSystem):
+        class Config:
+            x: X.Config = X.Config()
+            l: List[X.Config] = []
+            d: Dict[str, X.Config] = {}
+            c: float = 1.0
+    
+    data = {'x':{'a':1}, 'l':[{'a':2}, X.Config(a=3)], 'd':{'k':{'b':"k"}} }
+    config = A.Config.parse_trusted(data)
+    assert config == A.Config(**data)
+    assert config.__fields_set__ == {'x', 'l', 'd'}
+    assert isinstance(config.x, X.Config) and config.x.b == "b"
+    assert [x.a for x in config.l] == [2, 3]
+    assert config.d['k'].b == "k"
+    assert config.c == 1.0 
+    
+    # no validation at all 
+    assert A.Config.parse_trusted({'c':"not a float"}).c == "not a float"
+    with pytest.raises(ValueError):
+        A(c="not a float")
+    assert A(__trusted__=True, c="not a float").c == "not a float"
+    
+    a = A(__trusted__=True, __config__=data)
+    assert a.l[1].a == 3 
+    assert a.d['k'].b == "k"
+
+    factories = FactoryList.parse_trusted([{'a':1}], X.Config)
+    assert isinstance(factories[0], X.Config)
+    assert factories.__Factory__ is X.Config
+    
+    # data keyed by alias 
+    class B(BaseSystem):
+        class Config:
+            x: X.Config = Field(X.Config(), alias="xx")
+            n: int = Field(0, alias="nn")
+    
+    config = B.Config.parse_trusted({'xx': {'a': 3}, 'nn': 2})
+    assert isinstance(config.x, X.Config) and config.x.a == 3 
+    assert config.n == 2 
+    assert config.__fields_set__ == {'x', 'n'}
+    assert set(config.__dict__) == {'x', 'n'}
+    assert config == B.Config.parse_obj({'xx': {'a': 3}, 'nn': 2})
+    assert B.Config.parse_trusted({'x': {'a': 4}}).x.a == 4
+
+def test_deferred_config_class():
+    class X(BaseSystem):
+        class Config:
+            a: int = 0 
+    
+    class A(BaseSystem):
+        class Config:
+            x: X.Config = X.Config()
+            b: int = 1 
+    
+    class B(A):
+        def get_b(self):
+            return self.b 
+    
+    # B does not modify its Config, the class is created on first use 
+    assert not isinstance(B.__dict__['Config'], type)
+    assert B.Config is B.__dict__['Config']
+
+    class C(B):
+        class Config:
+            c: int = 2 
+    
+    assert issubclass(B.Config, A.Config)
+    assert B.Config.get_system_class() is B 
+    assert A.Config.get_system_class() is A 
+    assert issubclass(C.Config, B.Config)
+    assert B().get_b() == 1 
+    assert isinstance(B().x, X)
+    assert isinstance(B.Config().build(), B)
+    assert C(b=3).get_b() == 3 
+    assert list(B.__subsystem_slots__) == ['x']
+
+    class D(B):
+        pass 
+    # the Config of B is created when instantiating D 
+    d = D(b=4)
+    assert type(d.__config__) is D.Config 
+    assert issubclass(D.Config, B.Config)
+
 def test_append_factory_in_dict():
     class S(BaseSystem):
         pass 
@@ -235,6 +967,78 @@ def test_find_factories():
     assert len(list(find_factories(A, (BaseSystem, SystemList)))) == 2
     assert len(list(find_factories(A, (B, SystemList, SystemDict)))) == 3
 
+def test_find_factories_cache():
+    class B(BaseSystem):
+        pass 
+    class A(BaseSystem):
+        class Config:
+            b: B.Config = B.Config()
+            n: int = 0
+        f = B.Config()
+    
+    first = dict(find_factories(A))
+    assert list(first) == ['b', 'f']
+    # neither a copy nor a new computation 
+    second = dict(find_factories(A))
+    assert first['b'] is second['b']
+    assert first['b'] is A.Config.__fields__['b'].default
+    assert first['f'] is A.f 
+    assert list(find_factories(A, B, include=['f'])) == [('f', A.f)]
+    assert list(find_factories(A, B, exclude={'f'})) == [('b', first['b'])]
+    
+    # the cache of a class and its subclasses is dropped explicitly 
+    class C(A):
+        pass 
+    assert list(dict(find_factories(C))) == ['b', 'f']
+    A.g = B.Config()
+    clear_find_factories_cache(A)
+    assert list(dict(find_factories(A))) == ['b', 'f', 'g']
+    assert list(dict(find_factories(C))) == ['b', 'f', 'g']
+    del A.g 
+    clear_find_factories_cache()
+    assert list(dict(find_factories(C))) == ['b', 'f']
+    
+    A.g = B.Config()
+    systemclass(A)
+    assert list(dict(find_factories(A))) == ['b', 'f', 'g']
+
+def test_system_with_abc_mixin():
+    from abc import ABCMeta 
+    class MixinMeta(ABCMeta):
+        pass 
+    class Mixin(metaclass=MixinMeta):
+        pass 
+    class S(BaseSystem, Mixin):
+        class Config:
+            a: int = 0 
+    assert S(a=1).a == 1 
+
+def test_member_types():
+    class X(BaseSystem):
+        pass 
+    
+    class A(BaseSystem):
+        class Config:
+            x: X.Config = X.Config()
+            l: List[X.Config] = []
+            d: Dict[str, X.Config] = {}
+            f: Optional[BaseFactory] = None 
+            v: int = 0 
+    
+    members = A.Config.__member_types__
+    assert members['x'] == (MemberType.Factory, X)
+    assert members['l'] == (MemberType.FactoryList, X)
+    assert members['d'] == (MemberType.FactoryDict, X)
+    assert members['f'] == (MemberType.Factory, None)
+    assert members['v'] == (MemberType.Other, None)
+    with pytest.raises(TypeError):
+        members['v'] = (MemberType.Factory, X)
+    
+    class B(A):
+        class Config:
+            w: int = 0 
+    assert set(B.Config.__member_types__) == {'x', 'l', 'd', 'f', 'v', 'w'}
+
 def test_has_factory():
     class X(BaseSystem):
         pass 
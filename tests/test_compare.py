@@ -0,0 +1,101 @@
+from typing import Dict, List
+from systemy.compare import FactoryChange, diff_factories, fingerprint, same_tree
+from systemy.system import BaseSystem, FactoryDict
+
+
+class Motor(BaseSystem):
+    class Config:
+        speed: float = 1.0
+        name: str = ""
+
+class Stage(BaseSystem):
+    class Config:
+        x: Motor.Config = Motor.Config()
+        motors: Dict[str, Motor.Config] = {}
+        positions: List[float] = []
+
+
+def test_fingerprint():
+    s1 = Stage.Config(motors={'a':{}, 'b':{'speed':2.0}}, positions=[1.0])
+    s2 = Stage.Config(motors={'b':{'speed':2.0}, 'a':{}}, positions=[1.0])
+    assert fingerprint(s1) == fingerprint(s2)
+    assert same_tree(s1, s2)
+    assert fingerprint(s1) != fingerprint(Stage.Config())
+    assert fingerprint(Motor.Config()) != fingerprint(Stage.Config().x.copy(update={'speed':1})) # int vs float 
+
+    # cached fingerprints are dropped on assignment, up to the root 
+    f1 = fingerprint(s1)
+    s1.motors['a'].speed = 3.0 
+    assert fingerprint(s1) != f1 
+    s1.motors['a'].speed = 1.0 
+    assert fingerprint(s1) == f1 
+    
+    s1.x.update(name="x")
+    assert not same_tree(s1, s2)
+    s2.x = Motor.Config(name="x")
+    assert same_tree(s1, s2)
+    
+    # copies do not share the cache 
+    s3 = s1.copy()
+    s3.positions = [2.0]
+    assert fingerprint(s3) != fingerprint(s1) 
+    assert fingerprint(s1.copy(deep=True)) == fingerprint(s1)
+
+    d = FactoryDict({'a':Motor.Config()})
+    assert fingerprint(d) == fingerprint(FactoryDict({'a':Motor.Config()}))
+    assert fingerprint(d) != fingerprint(FactoryDict({'b':Motor.Config()}))
+
+def test_fingerprint_after_batch_reconfigure():
+    stage = Stage(motors={'a':{}})
+    stage.motors # built 
+    f1 = fingerprint(stage.__config__)
+    with stage.batch_reconfigure() as tx:
+        tx.set("motors['a'].speed", 4.0)
+    assert fingerprint(stage.__config__) != f1 
+    assert fingerprint(stage.__config__) == fingerprint(Stage.Config(motors={'a':{'speed':4.0}}))
+
+def test_diff_factories():
+    class Group(BaseSystem):
+        class Config:
+            motors: List[Motor.Config] = []
+            class Config:
+                extra = "allow"
+
+    old = Stage.Config(motors={'a':{}, 'b':{}}, positions=[1.0])
+    new = old.copy(deep=True)
+    assert diff_factories(old, new) == {}
+    
+    new.x.speed = 2.0 
+    new.motors = {'a':Motor.Config(name="a"), 'c':Motor.Config()}
+    new.positions = [2.0]
+    assert diff_factories(old, new) == {
+            "x.speed": FactoryChange("modified", 1.0, 2.0), 
+            "motors['a'].name": FactoryChange("modified", "", "a"), 
+            "motors['b']": FactoryChange("removed", old.motors['b'], None), 
+            "motors['c']": FactoryChange("added", None, new.motors['c']), 
+            "positions": FactoryChange("modified", [1.0], [2.0]), 
+        }
+    assert set(diff_factories(old, new, path="stage", trust_cache=True)) == {
+            "stage.x.speed", "stage.motors['a'].name", "stage.motors['b']", "stage.motors['c']", "stage.positions"
+        }
+    
+    g1 = Group.Config(motors=[{}, {}])
+    g2 = Group.Config(motors=[{}], extra=Motor.Config())
+    g3 = Group.Config(motors=[{}], extra=Stage.Config())
+    assert diff_factories(g1, g2) == {
+            "motors[1]": FactoryChange("removed", g1.motors[1], None), 
+            "extra": FactoryChange("added", None, g2.extra), 
+        }
+    assert diff_factories(g2, g3) == {"extra": FactoryChange("replaced", g2.extra, g3.extra)}
+
+def test_diff_trust_cache():
+    old = Stage.Config(motors={str(i):{} for i in range(10)})
+    new = Stage.Config(motors={str(i):{} for i in range(10)})
+    fingerprint(old), fingerprint(new)
+    # a change made in place is not seen by the cached fingerprints 
+    new.motors['3'].__dict__['speed'] = 5.0 
+    assert diff_factories(old, new) == {"motors['3'].speed": FactoryChange("modified", 1.0, 5.0)}
+    assert diff_factories(old, new, trust_cache=True) == {}
+    
+    new.motors['3'].speed = 6.0
+    assert diff_factories(old, new, trust_cache=True) == {"motors['3'].speed": FactoryChange("modified", 1.0, 6.0)}
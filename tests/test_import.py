@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_times(statement: str) -> dict:
+    """ run statement in a fresh interpreter with -X importtime, return module -> cumulative time (us) """
+    result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement], 
+            cwd=_root, capture_output=True, text=True, check=True
+        )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue # header 
+        times[name.strip()] = int(cumulative)
+    return times 
+
+def test_import_systemy_is_light():
+    times = import_times("import systemy")
+    assert "systemy" in times 
+    # the yaml loader machinery and the async/thread pool modules are imported on demand 
+    for module in ("systemy.loaders", "yaml", "attr", "py_expression_eval", "asyncio", "concurrent.futures"):
+        assert module not in times, f"{module} is imported by 'import systemy'"
+
+def test_loaders_are_imported_on_demand():
+    times = import_times("import systemy; systemy.SystemLoader")
+    assert "systemy.loaders" in times 
+    assert "py_expression_eval" not in times 
+
+def test_submodules_are_package_attributes():
+    times = import_times("import systemy; systemy.loaders.SystemLoader; systemy.compare.fingerprint; systemy.snapshot.load_config")
+    for module in ("systemy.loaders", "systemy.compare", "systemy.snapshot"):
+        assert module in times 
@@ -0,0 +1,120 @@
+from typing import Dict, List
+import os
+import warnings
+import pytest 
+from systemy.loaders import register_factory, clear_include_cache
+from systemy.snapshot import SnapshotError, compile_snapshot, load_snapshot, load_config, default_snapshot_file
+from systemy.system import BaseSystem 
+
+@register_factory("Snap:Motor")
+class Motor(BaseSystem):
+    class Config:
+        speed: float = 1.0
+        name: str = ""
+
+@register_factory("Snap:Stage")
+class Stage(BaseSystem):
+    class Config:
+        x = Motor.Config()
+        motors: Dict[str, Motor.Config] = {}
+        positions: List[float] = []
+        class Config:
+            extra = "allow"
+
+
+motor_file = """!factory:Snap:Motor
+speed: !math 2*3
+"""
+
+stage_file = """!factory:Snap:Stage
+x: !include:{motor}
+    name: x
+motors:
+    y: !include:{motor}
+    z: !factory:Snap:Motor 
+        speed: 3
+positions: [1.0, 2.0]
+comment: hello 
+"""
+
+@pytest.fixture
+def config_files(tmp_path):
+    clear_include_cache()
+    motor = tmp_path/"motor.yaml"
+    motor.write_text(motor_file)
+    stage = tmp_path/"stage.yaml"
+    stage.write_text(stage_file.format(motor=motor))
+    return str(stage), str(motor)
+
+def test_snapshot(config_files):
+    stage, motor = config_files
+    snapshot = default_snapshot_file(stage)
+    
+    factory = compile_snapshot(stage)
+    assert os.path.exists(snapshot)
+    loaded = load_snapshot(snapshot)
+    assert isinstance(loaded, Stage.Config)
+    assert loaded == factory 
+    assert loaded.x.speed == 6 
+    assert loaded.x.name == "x"
+    assert isinstance(loaded.motors['y'], Motor.Config)
+    assert loaded.motors['z'].speed == 3
+    assert loaded.positions == [1.0, 2.0]
+    assert loaded.comment == "hello"
+    
+    # a modification of an included file makes the snapshot out of date 
+    with open(motor, "w") as f:
+        f.write(motor_file.replace("2*3", "2*4"))
+    assert load_snapshot(snapshot) is None 
+    
+    factory = load_config(stage)
+    assert factory.x.speed == 8 
+    assert load_snapshot(snapshot) == factory 
+    
+    # a touch without modification is fine 
+    os.utime(motor, None)
+    assert load_snapshot(snapshot, file_name=stage) == factory
+    assert load_snapshot(snapshot, file_name=motor) is None 
+
+def test_trusted_snapshot(config_files):
+    stage, _ = config_files
+    factory = compile_snapshot(stage)
+    loaded = load_config(stage, trusted=True)
+    assert loaded == factory 
+    assert isinstance(loaded.motors['y'], Motor.Config)
+    assert loaded.x.speed == 6
+    assert loaded.__fields_set__ == factory.__fields_set__
+
+def test_snapshot_of_sub_path(tmp_path):
+    clear_include_cache()
+    catalog = tmp_path/"catalog.yaml"
+    catalog.write_text("""
+slow: !factory:Snap:Motor
+    speed: 1
+fast: !factory:Snap:Motor
+    speed: 10
+""")
+    assert default_snapshot_file(str(catalog), ("a", "b")) == f"{catalog}(a.b).snapshot"
+    assert load_config(f"{catalog}(slow)").speed == 1
+    assert load_config(f"{catalog}(fast)").speed == 10
+    assert os.path.exists(f"{catalog}(slow).snapshot")
+    assert os.path.exists(f"{catalog}(fast).snapshot")
+    # each path has its own up to date snapshot 
+    assert load_snapshot(f"{catalog}(slow).snapshot", file_name=f"{catalog}(slow)").speed == 1
+    assert load_snapshot(f"{catalog}(fast).snapshot", file_name=f"{catalog}(fast)").speed == 10
+
+def test_no_snapshot_of_random_values(tmp_path):
+    clear_include_cache()
+    motor = tmp_path/"motor.yaml"
+    motor.write_text("!factory:Snap:Motor\nspeed: !math random(1000000)\n")
+    stage = tmp_path/"stage.yaml"
+    stage.write_text(f"!factory:Snap:Stage\nx: !include:{motor}\n")
+    
+    with pytest.raises(SnapshotError):
+        compile_snapshot(str(stage))
+    assert not os.path.exists(default_snapshot_file(str(stage)))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        speeds = {load_config(str(stage)).x.speed for _ in range(3)}
+    assert len(speeds) > 1 
+    assert not os.path.exists(default_snapshot_file(str(stage)))
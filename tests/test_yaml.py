@@ -1,5 +1,7 @@
-from systemy.loaders import SystemLoader, get_factory_class, get_system_class, register_factory, split_factory_definition
+from systemy.loaders import SystemIo, SystemLoader, get_factory_class, get_system_class, register_factory, split_factory_definition, math_cache_info, clear_math_cache, eval_math, set_math_backend, clear_include_cache, load_include
 from systemy.system import BaseFactory, BaseSystem
+from systemy.registry import FactoryRegistry, FactoryOverwriteWarning
+import sys
 import yaml
 import pytest 
 
@@ -107,10 +109,162 @@ def test_include_loader():
     with open("/tmp/test_system.yaml", "w") as g:
         g.write(test_file2)
     f = yaml.load( test6, SystemLoader)
+    assert isinstance(f.bedroom, Room.Config)
     assert f.bedroom.width == 7
+    assert f.bedroom.height == 3
 
 
 
+def test_math_cache():
+    clear_math_cache()
+    src = "!factory:Room\nwidth: !math 2*pi\nheight: !math 2*pi\nmisc: !math random(1)*0\n"
+    for i in range(3):
+        f = yaml.load( src, SystemLoader)
+    assert abs(f.width - 6.283185307179586) < 1e-12
+    info = math_cache_info()
+    assert info['value'].misses == 1
+    assert info['value'].hits == 5
+    assert info['parse'].misses == 2
+    assert eval_math("1,2") == [1, 2]
+    assert eval_math("1,2") is not eval_math("1,2")
+
+
+def test_compiled_math_backend():
+    expressions = [
+        "1+2*3", "2^3^2", "-2^2", "sin(pi/2)", "max(1,2,3)", "pyt(3,4)", "if(1>2, 3, 4)", 
+        "'a' || 'b'", "2 in (1,2,3)", "not 0", "1,2", "fac(5)", "3 % 2", "e*2", "cos(PI)", 
+        "(1+2)*(3-4)/5", "1 and 0", 
+    ]
+    try:
+        set_math_backend("interpreted")
+        interpreted = [eval_math(e) for e in expressions]
+        set_math_backend("compiled")
+        compiled = [eval_math(e) for e in expressions]
+        assert compiled == interpreted
+        with pytest.raises(Exception):
+            eval_math("x+1")
+    finally:
+        set_math_backend("interpreted")
+
+
+def test_include_cache(tmp_path):
+    clear_include_cache()
+    part = tmp_path/"part.yaml"
+    part.write_text("!factory:Room\nwidth: 2\n")
+    motor = tmp_path/"motor.yaml"
+    motor.write_text(f"!factory:House\nbedroom: !include:{part}\n")
+    src = f"""!factory:House
+bedroom: !include:{motor}
+    width: 6
+big_room: !include:{motor}
+"""
+    f = yaml.load(src, SystemLoader)
+    assert f.bedroom.width == 6
+    assert f.big_room.width == 99
+    assert f.bedroom is not f.big_room 
+    assert f.bedroom.bedroom is not f.big_room.bedroom 
+    
+    cached = load_include(str(motor))
+    assert load_include(str(motor)) is cached  
+    assert cached.width == 99 
+
+    # a change in a nested include invalidates the parent include 
+    part.write_text("!factory:Room\nwidth: 300\n")
+    f = yaml.load(src, SystemLoader)
+    assert f.big_room.bedroom.width == 300
+    assert load_include(str(motor)) is not cached 
+    
+    cached = load_include(str(motor))
+    clear_include_cache(str(part))
+    assert load_include(str(motor)) is not cached
+
+
+def test_include_cache_search_path(tmp_path, monkeypatch):
+    clear_include_cache()
+    d1 = tmp_path/"d1"
+    d2 = tmp_path/"d2"
+    d1.mkdir()
+    d2.mkdir()
+    (d1/"part.yaml").write_text("!factory:Room\nwidth: 1\n")
+    (d2/"part.yaml").write_text("!factory:Room\nwidth: 2\n")
+    house = tmp_path/"house.yaml"
+    house.write_text("!factory:House\nbedroom: !include:part.yaml\n")
+
+    monkeypatch.setenv("SYSTEMYPATH", str(d1))
+    assert load_include(str(house)).bedroom.width == 1
+    monkeypatch.setenv("SYSTEMYPATH", str(d2))
+    assert load_include(str(house)).bedroom.width == 2
+
+    # files with non constant !math are not cached, nor the files including them
+    (d2/"part.yaml").write_text("!factory:Room\nwidth: !math random(10)\n")
+    clear_include_cache()
+    assert load_include(str(house)) is not load_include(str(house))
+    assert load_include(str(d2/"part.yaml")) is not load_include(str(d2/"part.yaml"))
+
+
+def test_include_sub_tree(tmp_path):
+    catalog = tmp_path/"catalog.yaml"
+    catalog.write_text("""
+rooms:
+    small: !factory:Room
+        width: 1
+    list: 
+        - !factory:Room
+            width: 2
+        - !factory:Room
+            width: 3
+broken: !factory:Unknown
+    width: 1
+""")
+    f = yaml.load(f"!factory:House\nbedroom: !include:{catalog}(rooms.small)\n", SystemLoader)
+    assert f.bedroom.width == 1
+    f = yaml.load(f"!factory:House\nbedroom: !include:{catalog}(rooms.list.1)\n", SystemLoader)
+    assert f.bedroom.width == 3
+    with pytest.raises(ValueError):
+        yaml.load(f"!factory:House\nbedroom: !include:{catalog}(rooms.big)\n", SystemLoader)
+    with pytest.raises(ValueError):
+        yaml.load(f"!factory:House\nbedroom: !include:{catalog}(broken)\n", SystemLoader)
+
+
+def test_system_io_cache(tmp_path, monkeypatch):
+    d1 = tmp_path/"d1"
+    d2 = tmp_path/"d2"
+    d1.mkdir()
+    d2.mkdir()
+    (d1/"a.yaml").write_text("")
+    
+    for use_listing in [False, True]:
+        io = SystemIo(use_listing=use_listing)
+        monkeypatch.setenv("SYSTEMYPATH", f"{d1}:{d2}")
+        assert io.find("a.yaml") == str(d1/"a.yaml")
+        with pytest.raises(ValueError):
+            io.find("b.yaml")
+        
+        (d2/"b.yaml").write_text("")
+        assert io.find("b.yaml") == str(d2/"b.yaml") # misses are not cached 
+        (d2/"b.yaml").unlink()
+        
+        io = SystemIo(use_listing=use_listing, cache_misses=True)
+        with pytest.raises(ValueError):
+            io.find("b.yaml")
+        (d2/"b.yaml").write_text("")
+        with pytest.raises(ValueError): # negative cache 
+            io.find("b.yaml")
+        io.clear_cache()
+        assert io.find("b.yaml") == str(d2/"b.yaml")
+        assert io.find("a.yaml") == str(d1/"a.yaml")
+        
+        (d2/"a.yaml").write_text("")
+        assert io.find("a.yaml") == str(d1/"a.yaml")
+        monkeypatch.setenv("SYSTEMYPATH", f"{d2}:{d1}") # path change invalidate the cache 
+        assert io.find("a.yaml") == str(d1/"a.yaml")
+        monkeypatch.setenv("SYSTEMYPATH", f"{d1}:{d2}")
+        assert io.find("a.yaml") == str(d2/"a.yaml")
+        
+        (d2/"a.yaml").unlink()
+        (d2/"b.yaml").unlink()
+
+
 def test_factory_name_structure():
 
     assert split_factory_definition("ns:kind/name") == ("ns","kind", "name")
@@ -121,6 +275,71 @@ def test_factory_name_structure():
 
 
 
+def test_factory_registry():
+    class A(BaseSystem):
+        pass 
+    class B(BaseSystem):
+        pass 
+    registry = FactoryRegistry()
+    registry.register(A.Config, "A", "ns1", "motor")
+    registry.register(B.Config, "B", "ns2", "motor")
+    
+    assert registry.get("A") is A.Config 
+    assert registry.get("ns1:motor/A") is A.Config 
+    assert registry.get("A", namespace="ns1") is A.Config 
+    assert registry.get_key(B.Config) == ("ns2", "motor", "B")
+    assert dict(registry.iter(namespace="ns1", kind="motor")) == {"A":A.Config}
+    assert dict(registry.iter(kind="motor")) == {"A":A.Config, "B":B.Config}
+    assert list(registry.iter_namespaces()) == ["ns1", "ns2"]
+    with pytest.raises(ValueError):
+        registry.get("ns2:A")
+    
+    # same short name in another namespace, recorded but not a warning 
+    registry.register(B.Config, "A", "ns2")
+    assert registry.get("A") is B.Config 
+    assert registry.get("ns1:A") is A.Config 
+    assert registry.conflicts[-1].key == (None, None, "A")
+    
+    with pytest.warns(FactoryOverwriteWarning):
+        registry.register(B.Config, "A", "ns1", "motor")
+    assert registry.get("ns1:motor/A") is B.Config 
+
+
+lazy_plugin_module = """
+from systemy.system import BaseSystem 
+class Plugin(BaseSystem):
+    class Config:
+        x: int = 0 
+"""
+
+def test_lazy_factory_registry(tmp_path, monkeypatch):
+    (tmp_path/"systemy_lazy_plugin.py").write_text(lazy_plugin_module)
+    (tmp_path/"systemy_ep_plugin.py").write_text(lazy_plugin_module)
+    dist_info = tmp_path/"systemy_ep_plugin-1.0.dist-info"
+    dist_info.mkdir()
+    (dist_info/"METADATA").write_text("Metadata-Version: 2.1\nName: systemy-ep-plugin\nVersion: 1.0\n")
+    (dist_info/"entry_points.txt").write_text("[systemy.factories]\nEp:Plugin = systemy_ep_plugin:Plugin\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    
+    registry = FactoryRegistry()
+    registry.register_lazy("systemy_lazy_plugin:Plugin", "Plugin", "Lazy", "device")
+    assert list(registry.iter_names(kind="device", namespace="Lazy")) == ["Plugin"]
+    assert "systemy_lazy_plugin" not in sys.modules
+    
+    Factory = registry.get("Lazy:Plugin")
+    assert "systemy_lazy_plugin" in sys.modules
+    assert Factory is sys.modules["systemy_lazy_plugin"].Plugin.Config 
+    assert registry.get("device/Plugin") is Factory 
+    
+    assert "systemy_ep_plugin" not in sys.modules 
+    assert list(registry.iter_namespaces()) == ["Ep", "Lazy"]
+    Factory = registry.get("Ep:Plugin")
+    assert Factory is sys.modules["systemy_ep_plugin"].Plugin.Config 
+    
+    with pytest.raises(ValueError):
+        registry.register_lazy("no_attribute", "Bad")
+
+
 def test_get_system_class():
     assert get_system_class("House") is House
 